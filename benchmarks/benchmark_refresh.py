@@ -0,0 +1,208 @@
+"""Benchmark the refresh of SenertecCoordinator against the offline fake cloud.
+
+Reports refresh wall time, executor thread occupancy, entity state writes
+per poll, memory per entity and the render time of the metrics export for
+a range of unit counts. No network is
+needed, only homeassistant and py-senertec have to be installed:
+
+    python benchmarks/benchmark_refresh.py --units 1 5 10 25 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import entity_registry as er, frame  # noqa: E402
+
+from custom_components.senertec.CloudPool import CloudPool  # noqa: E402
+from custom_components.senertec.const import (  # noqa: E402
+    CONF_MAX_CONNECTIONS,
+    CONF_WAIT_INTERVAL,
+    PRODUCTGROUPSPATH,
+    SELECTED_DEVICES,
+)
+from custom_components.senertec.DatapointNames import DatapointNames  # noqa: E402
+from custom_components.senertec.MetricsExport import renderPrometheus  # noqa: E402
+from custom_components.senertec.ProductGroupRegistry import (  # noqa: E402
+    ProductGroupRegistry,
+)
+from custom_components.senertec.SenertecCoordinator import (  # noqa: E402
+    SenertecCoordinator,
+)
+from fake_senertec import FakeCloud, FakeSenertec  # noqa: E402
+
+
+class OccupancyExecutor(ThreadPoolExecutor):
+    """Thread pool which sums up the time its threads were busy."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the executor."""
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.busy = 0.0
+        self.jobs = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        """Submit a job and measure how long it occupies a thread."""
+
+        def measured():
+            start = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.busy += time.monotonic() - start
+                    self.jobs += 1
+
+        return super().submit(measured)
+
+
+class BenchmarkEntry:
+    """Minimal config entry for the coordinator."""
+
+    def __init__(self, data: dict, options: dict):
+        """Initialize the entry."""
+        self.entry_id = "benchmark"
+        self.unique_id = data["email"]
+        self.domain = "senertec"
+        self.title = "Senertec - benchmark"
+        self.data = data
+        self.options = options
+
+    def async_on_unload(self, func):
+        """Ignore unload callbacks, the entry is never unloaded."""
+
+
+async def run(units: int, args) -> dict:
+    """Run the polls for a number of units and return the measurements."""
+    loop = asyncio.get_running_loop()
+    executor = OccupancyExecutor(max_workers=args.executor_threads)
+    loop.set_default_executor(executor)
+    hass = HomeAssistant(tempfile.mkdtemp())
+    # like the test helpers of Home Assistant, helpers report deprecated usage through it
+    frame.async_setup(hass)
+    # the coordinator skips datapoints of disabled entities
+    await er.async_load(hass)
+    productGroups = ProductGroupRegistry.load("", None)
+    with open(PRODUCTGROUPSPATH, encoding="utf-8") as file:
+        cloud = FakeCloud(
+            json.load(file),
+            units,
+            latency=args.latency,
+            jitter=args.jitter,
+            dropRate=args.drop,
+            callLatency=args.call_latency,
+        )
+    FakeSenertec.cloud = cloud
+    entry = BenchmarkEntry(
+        {"email": "bench@example.com", "password": "", SELECTED_DEVICES: [u.serial for u in cloud.units]},
+        {CONF_WAIT_INTERVAL: args.wait, CONF_MAX_CONNECTIONS: args.max_connections},
+    )
+    with patch(
+        "custom_components.senertec.SenertecSession.senertec", FakeSenertec
+    ):
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        coordinator = SenertecCoordinator(
+            hass,
+            entry,
+            productGroups,
+            CloudPool(args.max_connections, 0),
+            DatapointNames(hass),
+        )
+        durations = []
+        writes = []
+        busy = []
+        memory_per_entity = None
+        for poll in range(args.polls):
+            revisions = sum(slot.revision for slot in coordinator.sensor_slots.values())
+            busy_before = executor.busy
+            start = time.monotonic()
+            await coordinator.async_refresh()
+            durations.append(time.monotonic() - start)
+            busy.append(executor.busy - busy_before)
+            writes.append(
+                sum(slot.revision for slot in coordinator.sensor_slots.values())
+                - revisions
+            )
+            if poll == 0:
+                entities = len(coordinator.sensor_slots) or 1
+                memory_per_entity = (tracemalloc.get_traced_memory()[0] - baseline) / entities
+        tracemalloc.stop()
+        # the first scrape after a refresh renders the export, later ones use the cache
+        export = []
+        for _ in range(2):
+            start = time.monotonic()
+            renderPrometheus([coordinator.export])
+            export.append(time.monotonic() - start)
+        await coordinator.async_shutdown()
+    executor.shutdown(wait=False)
+    return {
+        "units": units,
+        "entities": len(coordinator.sensor_slots),
+        "refresh_s": statistics.mean(durations),
+        "refresh_max_s": max(durations),
+        "executor_busy_s": statistics.mean(busy),
+        "occupancy": statistics.mean(b / d for b, d in zip(busy, durations) if d),
+        "writes_per_poll": statistics.mean(writes[1:] or writes),
+        "memory_per_entity_b": memory_per_entity,
+        "export_render_s": export[0],
+        "export_cached_s": export[1],
+        "cloud_calls": dict(sorted(cloud.calls.items())),
+    }
+
+
+def main():
+    """Parse the arguments and print one line per unit count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--polls", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="frame latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="frame jitter (s)")
+    parser.add_argument("--drop", type=float, default=0.0, help="frame drop rate")
+    parser.add_argument("--call-latency", type=float, default=0.02, help="REST call latency (s)")
+    parser.add_argument("--wait", type=int, default=5, help="wait_interval option (s)")
+    parser.add_argument("--max-connections", type=int, default=2)
+    parser.add_argument("--executor-threads", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = [asyncio.run(run(units, args)) for units in args.units]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{'units':>5} {'entities':>8} {'refresh s':>10} {'max s':>8} "
+        f"{'busy s':>8} {'occupancy':>9} {'writes/poll':>11} {'B/entity':>9} "
+        f"{'export ms':>9} {'cached ms':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['units']:>5} {result['entities']:>8} {result['refresh_s']:>10.3f} "
+            f"{result['refresh_max_s']:>8.3f} {result['executor_busy_s']:>8.3f} "
+            f"{result['occupancy']:>9.2f} {result['writes_per_poll']:>11.1f} "
+            f"{result['memory_per_entity_b']:>9.0f} "
+            f"{result['export_render_s'] * 1000:>9.2f} {result['export_cached_s'] * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
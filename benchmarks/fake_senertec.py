@@ -0,0 +1,259 @@
+"""Offline stand-in for the py-senertec client.
+
+Emulates login, init, getUnits, connectUnit, getErrors and request of
+``senertec.client.senertec`` and replays the requested datapoints as
+``canipValue`` frames from a websocket-like thread with configurable
+latency, jitter and drop rate. The datapoints of every unit are taken
+from its product group in productGroups.json.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+from senertec.canipError import canipError
+from senertec.canipValue import canipValue
+from senertec.energyUnit import energyUnit
+from senertec.obdClass import obdClass
+
+# board which is used for entries without an explicit board
+DEFAULT_BOARD = "BOARD@1"
+# units per obdClass, values of signals change on every poll
+UNITS = {obdClass.Signal: "W", obdClass.Counter: "kWh", obdClass.Parameter: "°C"}
+
+
+class FakeDatapoint:
+    """A datapoint of a fake board, see senertec.datapoint."""
+
+    def __init__(self, name: str):
+        """Initialize the datapoint, the obdClass is derived from the name."""
+        self.id = f"{name.lower()}-id"
+        self.sourceId = name
+        self.friendlyName = f"Datapoint {name}"
+        kind = name[1:2].upper()
+        self.type = (
+            obdClass.Counter
+            if kind == "C"
+            else obdClass.Parameter
+            if kind == "P"
+            else obdClass.Signal
+        )
+        self.unit = UNITS[self.type]
+        self.array = False
+
+
+class FakeBoard:
+    """A board of a fake unit, see senertec.board."""
+
+    def __init__(self, name: str):
+        """Initialize an empty board."""
+        self.boardName = name
+        self.datapoints: list[FakeDatapoint] = []
+
+    def getFullDatapointIdByName(self, name: str):
+        """Return the full datapoint id like senertec.board does."""
+        for point in self.datapoints:
+            if name.lower() in point.sourceId.lower():
+                return self.boardName + "." + point.id
+        return None
+
+
+class FakeCloud:
+    """Shared behaviour of all fake clients of a benchmark run."""
+
+    def __init__(
+        self,
+        productGroups: dict,
+        units: int,
+        latency: float = 0.05,
+        jitter: float = 0.05,
+        dropRate: float = 0.0,
+        callLatency: float = 0.0,
+        errorsPerUnit: int = 1,
+        seed: int = 0,
+    ):
+        """Initialize the cloud with units spread over all product groups."""
+        self.productGroups = productGroups
+        self.latency = latency
+        self.jitter = jitter
+        self.dropRate = dropRate
+        self.callLatency = callLatency
+        self.errorsPerUnit = errorsPerUnit
+        self.random = random.Random(seed)
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+        groups = list(productGroups)
+        self.units = []
+        for index in range(units):
+            unit = energyUnit()
+            unit.serial = f"FAKE{index:04d}"
+            unit.model = f"Fake {groups[index % len(groups)]}"
+            unit.productGroup = groups[index % len(groups)]
+            unit.connected = True
+            unit.online = True
+            self.units.append(unit)
+        self._boards = {group: self._buildBoards(group) for group in groups}
+        self._values: dict[tuple[str, str], float] = {}
+
+    def _buildBoards(self, productGroup: str) -> list[FakeBoard]:
+        boards: dict[str, FakeBoard] = {}
+        for entry in self.productGroups[productGroup]:
+            if isinstance(entry, dict):
+                boardName, name = entry.get("board") or DEFAULT_BOARD, entry["datapoint"]
+            elif isinstance(entry, list):
+                boardName, name = entry
+            else:
+                boardName, name = DEFAULT_BOARD, entry
+            board = boards.setdefault(boardName, FakeBoard(boardName))
+            if not any(point.sourceId == name for point in board.datapoints):
+                board.datapoints.append(FakeDatapoint(name))
+        return list(boards.values())
+
+    def call(self, name: str):
+        """Count a cloud call and wait for its latency."""
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.callLatency:
+            time.sleep(self.callLatency)
+
+    def boards(self, productGroup: str) -> list[FakeBoard]:
+        """Return the boards of a product group."""
+        return self._boards[productGroup]
+
+    def nextValue(self, serial: str, point: FakeDatapoint):
+        """Return the next value of a datapoint."""
+        with self._lock:
+            key = (serial, point.sourceId)
+            value = self._values.get(key)
+            if value is None:
+                value = round(self.random.uniform(0, 1000), 2)
+            elif point.type == obdClass.Signal:
+                value = round(self.random.uniform(0, 1000), 2)
+            elif point.type == obdClass.Counter:
+                value = round(value + self.random.uniform(0, 1), 2)
+            self._values[key] = value
+            return value
+
+    def frameDelay(self) -> float | None:
+        """Return the delay of a frame or None if it gets dropped."""
+        with self._lock:
+            if self.random.random() < self.dropRate:
+                return None
+            return max(0.0, self.latency + self.random.uniform(-1, 1) * self.jitter)
+
+
+class FakeSenertec:
+    """Drop-in replacement of senertec.client.senertec which talks to a FakeCloud.
+
+    Set FakeSenertec.cloud before creating clients.
+    """
+
+    cloud: FakeCloud
+
+    def __init__(self, language=None, level=None):
+        """Initialize the client."""
+        self.messagecallback = None
+        self.__is_ws_connected__ = False
+        self._connected: energyUnit | None = None
+        self._logged_in = False
+
+    @property
+    def boards(self) -> list[FakeBoard]:
+        """Return the boards of the connected unit."""
+        if self._connected is None:
+            return []
+        return self.cloud.boards(self._connected.productGroup)
+
+    def login(self, email: str, password: str):
+        """Emulate the login."""
+        self.cloud.call("login")
+        self._logged_in = True
+
+    def init(self) -> bool:
+        """Emulate init and the websocket connection."""
+        self.cloud.call("init")
+        self.__is_ws_connected__ = self._logged_in
+        return self._logged_in
+
+    def logout(self) -> bool:
+        """Emulate the logout."""
+        self.cloud.call("logout")
+        self._logged_in = False
+        self.__is_ws_connected__ = False
+        return True
+
+    def getUnits(self) -> list[energyUnit] | None:
+        """Return all units of the fake cloud."""
+        self.cloud.call("getUnits")
+        return list(self.cloud.units) if self._logged_in else None
+
+    def connectUnit(self, serial: str) -> bool:
+        """Connect to a unit of the fake cloud."""
+        self.cloud.call("connectUnit")
+        self._connected = next(
+            (unit for unit in self.cloud.units if unit.serial == serial), None
+        )
+        return self._logged_in and self._connected is not None
+
+    def disconnectUnit(self) -> bool:
+        """Disconnect the unit."""
+        self.cloud.call("disconnectUnit")
+        self._connected = None
+        return True
+
+    def getErrors(self, onlyCurrentErrors: bool = True) -> list[canipError]:
+        """Return fake errors of the connected unit."""
+        errors = []
+        for index in range(self.cloud.errorsPerUnit):
+            error = canipError()
+            error.__boardName__ = DEFAULT_BOARD
+            error.__code__ = f"E{index:03d}"
+            error.__currentError__ = True
+            error.__errorCategory__ = "Fake category"
+            error.__errorTranslation__ = "Fake error"
+            error.__timestamp__ = "1700000000000"
+            errors.append(error)
+        return errors
+
+    def request(self, datapoints: dict) -> int:
+        """Request datapoints like senertec.request and replay them as frames."""
+        self.cloud.call("request")
+        unit = self._connected
+        frames = []
+        for entry in datapoints[unit.productGroup]:
+            boardName, name = entry if isinstance(entry, list) else (None, entry)
+            for board in self.boards:
+                if boardName is not None and board.boardName != boardName:
+                    continue
+                point = next(
+                    (p for p in board.datapoints if name.lower() in p.sourceId.lower()),
+                    None,
+                )
+                if point is None:
+                    continue
+                delay = self.cloud.frameDelay()
+                if delay is not None:
+                    frames.append((delay, board, point))
+                break
+        threading.Thread(
+            target=self._replay, args=(unit, sorted(frames, key=lambda f: f[0])), daemon=True
+        ).start()
+        return len(frames)
+
+    def _replay(self, unit: energyUnit, frames):
+        start = time.monotonic()
+        for delay, board, point in frames:
+            remaining = start + delay - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            value = canipValue()
+            value.boardName = board.boardName
+            value.deviceSerial = unit.serial
+            value.sourceDatapoint = point.sourceId
+            value.friendlyDataName = point.friendlyName
+            value.dataValue = self.cloud.nextValue(unit.serial, point)
+            value.dataUnit = point.unit
+            value.array = False
+            self.messagecallback(value)
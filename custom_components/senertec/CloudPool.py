@@ -0,0 +1,21 @@
+import asyncio
+import time
+
+
+class CloudPool:
+    """Limits and staggers the cloud connections of all config entries."""
+
+    def __init__(self, max_connections: int, stagger: float):
+        """Initialize the pool."""
+        # held while a session talks to the cloud, shared by all accounts
+        self.connection = asyncio.Semaphore(max_connections)
+        self._stagger = stagger
+        self._next_start = 0.0
+
+    async def async_wait_for_start(self):
+        """Wait until this refresh may start, refreshes start at least stagger seconds apart."""
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self._stagger
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -0,0 +1,149 @@
+"""Energy and hour counters imported as external long-term statistics."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+from homeassistant.util.unit_conversion import EnergyConverter
+from senertec.client import energyUnit
+
+from .const import DOMAIN, STATISTICS_UNITS
+from .SensorSlot import SensorSlot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class CounterStatistics:
+    """Collects the counter values per hour and imports them once per hour.
+
+    Values are assigned to the hour they were received in, so hours of failed
+    polls are filled by the next received value instead of being lost.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the importer."""
+        self._hass = hass
+        self._lock = asyncio.Lock()
+        # statistic id -> hour start -> last counter value received in that hour
+        self._pending: dict[str, dict[datetime, float]] = {}
+        self._metadata: dict[str, StatisticMetaData] = {}
+        # statistic id -> (hour start, state, sum) of the last imported hour
+        self._last: dict[str, tuple[datetime, float, float] | None] = {}
+        self._import_hour: datetime | None = None
+
+    @staticmethod
+    def statistic_id(serial: str, datapoint: str) -> str:
+        """Return the id of the external statistic of a datapoint."""
+        return f"{DOMAIN}:{slugify(f'{serial}_{datapoint}')}"
+
+    @callback
+    def async_add(
+        self,
+        devices: dict[str, energyUnit],
+        slots: dict[tuple[str, str], SensorSlot],
+    ):
+        """Take over the counter values of the slots, completed hours are imported once per hour."""
+        if "recorder" not in self._hass.config.components:
+            return
+        for (serial, datapoint), slot in slots.items():
+            device = devices.get(serial)
+            if (
+                device is None
+                or slot.unit not in STATISTICS_UNITS
+                or slot.updated is None
+                or isinstance(slot.value, bool)
+                or not isinstance(slot.value, (int, float))
+            ):
+                continue
+            statistic_id = self.statistic_id(serial, datapoint)
+            hour = _hour(slot.updated)
+            last = self._last.get(statistic_id)
+            if last is not None and hour <= last[0]:
+                # already imported
+                continue
+            self._metadata[statistic_id] = {
+                "has_mean": False,
+                "mean_type": StatisticMeanType.NONE,
+                "has_sum": True,
+                "name": f"{device.model} {slot.name}",
+                "source": DOMAIN,
+                "statistic_id": statistic_id,
+                "unit_class": (
+                    EnergyConverter.UNIT_CLASS
+                    if slot.unit in EnergyConverter.VALID_UNITS
+                    else None
+                ),
+                "unit_of_measurement": slot.unit,
+            }
+            self._pending.setdefault(statistic_id, {})[hour] = float(slot.value)
+        current = _hour(dt_util.utcnow())
+        if self._pending and self._import_hour != current:
+            self._import_hour = current
+            self._hass.async_create_background_task(
+                self.async_import(current), "senertec statistics import"
+            )
+
+    async def async_import(self, before: datetime | None = None):
+        """Import the pending hours which start before the given hour, all if None."""
+        async with self._lock:
+            for statistic_id, hours in list(self._pending.items()):
+                due = sorted(hour for hour in hours if before is None or hour < before)
+                if not due:
+                    continue
+                if statistic_id not in self._last:
+                    self._last[statistic_id] = await self._async_last(statistic_id)
+                last = self._last[statistic_id]
+                start, state, total = last if last is not None else (None, None, 0.0)
+                statistics: list[StatisticData] = []
+                for hour in due:
+                    value = hours.pop(hour)
+                    if start is not None and hour < start:
+                        continue
+                    if state is not None:
+                        # a counter which went down was reset
+                        total += value - state if value >= state else value
+                    state = value
+                    start = hour
+                    statistics.append({"start": hour, "state": value, "sum": total})
+                if not hours:
+                    del self._pending[statistic_id]
+                if not statistics:
+                    continue
+                self._last[statistic_id] = (start, state, total)
+                async_add_external_statistics(
+                    self._hass, self._metadata[statistic_id], statistics
+                )
+                _LOGGER.debug(
+                    "Imported %s hours of %s", len(statistics), statistic_id
+                )
+
+    async def _async_last(self, statistic_id: str):
+        result = await get_instance(self._hass).async_add_executor_job(
+            get_last_statistics, self._hass, 1, statistic_id, True, {"state", "sum"}
+        )
+        rows = result.get(statistic_id)
+        if not rows:
+            return None
+        return (
+            dt_util.utc_from_timestamp(rows[0]["start"]),
+            rows[0]["state"],
+            rows[0]["sum"],
+        )
@@ -0,0 +1,185 @@
+"""Recent values of the numeric datapoints and the sensors derived from them."""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+from typing import NamedTuple
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.const import PERCENTAGE
+from senertec.client import energyUnit
+
+from .const import HISTORY_SIZE, HISTORY_WINDOW, STATISTICS_UNITS
+from .SensorSlot import SensorSlot
+
+# datapoints with these units get a mean, min and max sensor over HISTORY_WINDOW
+WINDOW_UNITS = ("W", "kW")
+# unit of the rate of change per hour of a counter
+RATE_UNITS = {"Wh": "W", "kWh": "kW", "Hours": PERCENTAGE}
+# multiplier of the rate per hour, run hours per hour are shown as share of the time
+RATE_FACTORS = {"Hours": 100}
+# amounts in these units are converted to kW and kWh, so ratios can mix them
+KILO_UNITS = ("W", "Wh")
+
+
+class RingBuffer:
+    """Fixed size history of the values of one datapoint, the oldest values are overwritten."""
+
+    __slots__ = ("_times", "_values", "_next", "_count")
+
+    def __init__(self, size: int):
+        """Initialize an empty buffer."""
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._next = 0
+        self._count = 0
+
+    def append(self, timestamp: float, value: float):
+        """Add a value, it is ignored if it is not newer than the last one."""
+        size = len(self._values)
+        if self._count and timestamp <= self._times[self._next - 1]:
+            return
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % size
+        self._count = min(self._count + 1, size)
+
+    def window(self, since: float) -> tuple[array, array]:
+        """Return the times and values since a timestamp in chronological order."""
+        start = (self._next - self._count) % len(self._values)
+        if start + self._count <= len(self._values):
+            times = self._times[start : start + self._count]
+            values = self._values[start : start + self._count]
+        else:
+            times = self._times[start:] + self._times[: self._next]
+            values = self._values[start:] + self._values[: self._next]
+        first = next((i for i, t in enumerate(times) if t >= since), len(times))
+        return times[first:], values[first:]
+
+
+class DerivedValue(NamedTuple):
+    """Value and description of a derived sensor."""
+
+    name: str
+    value: float | None
+    unit: str | None
+    device_class: SensorDeviceClass | None
+    state_class: SensorStateClass | None
+
+
+def _isNumber(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class DatapointHistory:
+    """Ring buffers of all numeric datapoints of a config entry."""
+
+    def __init__(self):
+        """Initialize an empty history."""
+        self._buffers: dict[tuple[str, str], RingBuffer] = {}
+
+    def add(self, serial: str, datapoint: str, updated: datetime | None, value):
+        """Add a received value of a datapoint, non numeric values are ignored."""
+        if updated is None or not _isNumber(value):
+            return
+        buffer = self._buffers.get((serial, datapoint))
+        if buffer is None:
+            buffer = self._buffers[(serial, datapoint)] = RingBuffer(HISTORY_SIZE)
+        buffer.append(updated.timestamp(), value)
+
+    def derive(
+        self,
+        devices: dict[str, energyUnit],
+        slots: dict[tuple[str, str], SensorSlot],
+        now: datetime,
+        ratios: dict[str, dict[str, tuple[tuple[str, ...], tuple[str, ...]]]],
+    ) -> dict[tuple[str, str], DerivedValue]:
+        """Compute all derived sensors over the last HISTORY_WINDOW minutes.
+
+        ratios holds per serial the ratios in percent as
+        name -> (numerator datapoints, denominator datapoints). Counters contribute
+        their increase within the window, other datapoints their mean.
+        Returns the values per (serial, key).
+        """
+        since = now.timestamp() - HISTORY_WINDOW * 60
+        window = f"{HISTORY_WINDOW} min"
+        derived = {}
+        # increase of the counters and mean of the other datapoints, used by the ratios
+        amounts: dict[tuple[str, str], float | None] = {}
+        for key, buffer in self._buffers.items():
+            slot = slots.get(key)
+            if slot is None or key[0] not in devices:
+                continue
+            serial, datapoint = key
+            times, values = buffer.window(since)
+            if slot.unit in STATISTICS_UNITS:
+                rate = None
+                increase = None
+                if len(values) > 1 and values[-1] >= values[0]:
+                    increase = values[-1] - values[0]
+                    if times[-1] > times[0]:
+                        rate = (
+                            increase
+                            / (times[-1] - times[0])
+                            * 3600
+                            * RATE_FACTORS.get(slot.unit, 1)
+                        )
+                amounts[key] = self._kilo(increase, slot.unit)
+                derived[(serial, f"{datapoint}_rate")] = DerivedValue(
+                    f"{slot.name} rate ({window})",
+                    None if rate is None else round(rate, 3),
+                    RATE_UNITS[slot.unit],
+                    SensorDeviceClass.POWER if slot.unit != "Hours" else None,
+                    SensorStateClass.MEASUREMENT,
+                )
+                continue
+            mean = sum(values) / len(values) if values else None
+            amounts[key] = self._kilo(mean, slot.unit)
+            if slot.unit not in WINDOW_UNITS:
+                continue
+            for kind, value in (
+                ("mean", mean),
+                ("min", min(values, default=None)),
+                ("max", max(values, default=None)),
+            ):
+                derived[(serial, f"{datapoint}_{kind}")] = DerivedValue(
+                    f"{slot.name} {kind} ({window})",
+                    None if value is None else round(value, 3),
+                    slot.unit,
+                    SensorDeviceClass.POWER,
+                    SensorStateClass.MEASUREMENT,
+                )
+        for serial in devices:
+            for ratio, (numerators, denominators) in ratios.get(serial, {}).items():
+                numerator = self._sum(serial, numerators, amounts)
+                denominator = self._sum(serial, denominators, amounts)
+                value = (
+                    round(numerator / denominator * 100, 1)
+                    if numerator is not None and denominator
+                    else None
+                )
+                derived[(serial, f"ratio_{ratio}")] = DerivedValue(
+                    f"{ratio} ({window})",
+                    value,
+                    PERCENTAGE,
+                    None,
+                    SensorStateClass.MEASUREMENT,
+                )
+        return derived
+
+    @staticmethod
+    def _kilo(amount: float | None, unit: str | None) -> float | None:
+        if amount is None or unit not in KILO_UNITS:
+            return amount
+        return amount / 1000
+
+    @staticmethod
+    def _sum(serial: str, datapoints: tuple[str, ...], amounts) -> float | None:
+        total = 0.0
+        for datapoint in datapoints:
+            amount = amounts.get((serial, datapoint))
+            if amount is None:
+                return None
+            total += amount
+        return total
@@ -0,0 +1,54 @@
+"""Localized datapoint names of all languages, shared by all config entries."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DATAPOINT_NAMES, DOMAIN, NAMES_SAVE_DELAY, NAMES_STORAGE_VERSION
+from .SourceDatapoint import sourceDatapoint
+
+
+class DatapointNames:
+    """Names per language and source datapoint, filled from the metadata of each login."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize an empty cache."""
+        self._store: Store[dict] = Store(
+            hass, NAMES_STORAGE_VERSION, f"{DOMAIN}.names"
+        )
+        self._names: dict[str, dict[str, str]] = {}
+
+    async def async_load(self):
+        """Load the stored names."""
+        self._names = await self._store.async_load() or {}
+
+    def update(self, language: str, names: dict[str, str]) -> bool:
+        """Take over the names of a language, returns True if they changed."""
+        if self._names.get(language) == names:
+            return False
+        self._names[language] = names
+        self._store.async_delay_save(lambda: self._names, NAMES_SAVE_DELAY)
+        return True
+
+    def get(self, language: str, datapoint: str, default: str | None) -> str | None:
+        """Return the name of a datapoint in a language or default if it is not cached."""
+        names = self._names.get(language)
+        if not names:
+            return default
+        if datapoint in names:
+            return names[datapoint]
+        base = sourceDatapoint(datapoint)
+        if base != datapoint and base in names:
+            # values of arrays are named like senertec does, with the index appended
+            return f"{names[base]} {datapoint[len(base) + 1:]}"
+        return default
+
+
+async def async_get_names(hass: HomeAssistant) -> DatapointNames:
+    """Return the shared name cache, it is loaded on first use."""
+    names: DatapointNames | None = hass.data[DOMAIN].get(DATAPOINT_NAMES)
+    if names is None:
+        names = hass.data[DOMAIN][DATAPOINT_NAMES] = DatapointNames(hass)
+        await names.async_load()
+    return names
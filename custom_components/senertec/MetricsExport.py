@@ -0,0 +1,227 @@
+"""Prometheus and JSON export of the coordinator data for external monitoring."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.helpers.json import json_dumps
+
+from .const import CONF_METRICS_EXPORT, DEFAULT_METRICS_EXPORT
+
+if TYPE_CHECKING:
+    from .SenertecCoordinator import SenertecCoordinator
+
+PROMETHEUS_CONTENT_TYPE = "text/plain"
+
+# name, type and help of the exported metrics
+_METRICS = (
+    ("senertec_datapoint_value", "gauge", "Latest value of a numeric datapoint."),
+    ("senertec_datapoint_info", "gauge", "Latest value of a text datapoint as label."),
+    (
+        "senertec_datapoint_updated_timestamp_seconds",
+        "gauge",
+        "Time the latest value of a datapoint was received.",
+    ),
+    ("senertec_errors", "gauge", "Number of current errors of a unit."),
+    ("senertec_error", "gauge", "Current error of a unit."),
+    (
+        "senertec_poll_duration_seconds",
+        "gauge",
+        "Duration of the last poll of a unit.",
+    ),
+    (
+        "senertec_poll_expected",
+        "gauge",
+        "Datapoints requested by the last poll of a unit.",
+    ),
+    (
+        "senertec_poll_received",
+        "gauge",
+        "Datapoints received by the last poll of a unit.",
+    ),
+    (
+        "senertec_refresh_consecutive_failures",
+        "gauge",
+        "Number of failed refreshes in a row of an account.",
+    ),
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _isNumber(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetricsExport:
+    """Export of one coordinator, rendered at most once per data revision."""
+
+    def __init__(self, coordinator: SenertecCoordinator):
+        """Initialize the export."""
+        self._coordinator = coordinator
+        self._prometheus: tuple[int, dict[str, list[str]]] | None = None
+        self._json: tuple[int, str] | None = None
+
+    @property
+    def entry_id(self) -> str:
+        """Return the id of the config entry."""
+        return self._coordinator.config_entry.entry_id
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if the export is enabled in the options."""
+        return self._coordinator.config_entry.options.get(
+            CONF_METRICS_EXPORT, DEFAULT_METRICS_EXPORT
+        )
+
+    def prometheus(self) -> dict[str, list[str]]:
+        """Return the samples per metric name."""
+        revision = self._coordinator.data_revision
+        if self._prometheus is None or self._prometheus[0] != revision:
+            self._prometheus = (revision, self._renderPrometheus())
+        return self._prometheus[1]
+
+    def json(self) -> str:
+        """Return the data as compact JSON."""
+        revision = self._coordinator.data_revision
+        if self._json is None or self._json[0] != revision:
+            self._json = (revision, json_dumps(self._renderJson()))
+        return self._json[1]
+
+    def _renderPrometheus(self) -> dict[str, list[str]]:
+        coordinator = self._coordinator
+        samples: dict[str, list[str]] = {name: [] for name, _, _ in _METRICS}
+        entry_labels = _labels(entry=coordinator.config_entry.entry_id)
+        samples["senertec_refresh_consecutive_failures"].append(
+            f"senertec_refresh_consecutive_failures{{{entry_labels}}} "
+            f"{coordinator.consecutive_failures}"
+        )
+        for serial, device in (coordinator.data or {}).items():
+            unit = device["device"]
+            unit_labels = _labels(serial=serial, model=unit.model)
+            for datapoint, value in device["sensors"].items():
+                labels = _labels(
+                    serial=serial,
+                    model=unit.model,
+                    datapoint=datapoint,
+                    name=coordinator.datapoint_name(
+                        datapoint, value.friendlyDataName
+                    ),
+                    unit=value.dataUnit,
+                )
+                if _isNumber(value.dataValue):
+                    samples["senertec_datapoint_value"].append(
+                        f"senertec_datapoint_value{{{labels}}} {value.dataValue}"
+                    )
+                elif value.dataValue is not None:
+                    value_labels = _labels(value=value.dataValue)
+                    samples["senertec_datapoint_info"].append(
+                        f"senertec_datapoint_info{{{labels},{value_labels}}} 1"
+                    )
+                updated = device["updated"].get(datapoint)
+                if updated is not None:
+                    samples["senertec_datapoint_updated_timestamp_seconds"].append(
+                        f"senertec_datapoint_updated_timestamp_seconds{{{labels}}} "
+                        f"{updated.timestamp():.3f}"
+                    )
+            errors = device["errors"]
+            samples["senertec_errors"].append(
+                f"senertec_errors{{{unit_labels}}} {len(errors)}"
+            )
+            for error in errors:
+                error_labels = _labels(
+                    code=error.code,
+                    board=error.boardName,
+                    category=error.errorCategory,
+                )
+                samples["senertec_error"].append(
+                    f"senertec_error{{{unit_labels},{error_labels}}} 1"
+                )
+            stats = coordinator.poll_stats.get(serial)
+            if stats is not None:
+                samples["senertec_poll_duration_seconds"].append(
+                    f"senertec_poll_duration_seconds{{{unit_labels}}} {stats['duration']}"
+                )
+                samples["senertec_poll_expected"].append(
+                    f"senertec_poll_expected{{{unit_labels}}} {stats['expected']}"
+                )
+                samples["senertec_poll_received"].append(
+                    f"senertec_poll_received{{{unit_labels}}} {stats['received']}"
+                )
+        return samples
+
+    def _renderJson(self) -> dict:
+        coordinator = self._coordinator
+        return {
+            "consecutive_failures": coordinator.consecutive_failures,
+            "units": {
+                serial: {
+                    "model": device["device"].model,
+                    "productGroup": device["device"].productGroup,
+                    "datapoints": {
+                        datapoint: {
+                            "name": coordinator.datapoint_name(
+                                datapoint, value.friendlyDataName
+                            ),
+                            "value": value.dataValue,
+                            "unit": value.dataUnit,
+                            "updated": (
+                                updated.isoformat()
+                                if (updated := device["updated"].get(datapoint))
+                                else None
+                            ),
+                        }
+                        for datapoint, value in device["sensors"].items()
+                    },
+                    "errors": [error.code for error in device["errors"]],
+                    "poll": coordinator.poll_stats.get(serial),
+                }
+                for serial, device in (coordinator.data or {}).items()
+            },
+        }
+
+
+def renderPrometheus(exports: list[MetricsExport]) -> str:
+    """Merge the samples of several exports to the Prometheus text format."""
+    rendered = [export.prometheus() for export in exports]
+    lines = []
+    for name, metric_type, description in _METRICS:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for samples in rendered:
+            lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
+
+
+class SenertecMetricsView(HomeAssistantView):
+    """Serves the data of all accounts with enabled export, authentication is required."""
+
+    url = "/api/senertec/metrics"
+    extra_urls = ["/api/senertec/metrics.json"]
+    name = "api:senertec:metrics"
+
+    def __init__(self, get_exports: Callable[[], list[MetricsExport]]):
+        """Initialize the view, get_exports returns the enabled exports."""
+        self._get_exports = get_exports
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics, as JSON if the path ends with .json."""
+        exports = self._get_exports()
+        if request.path.endswith(".json"):
+            # the cached JSON of the entries is only joined
+            text = ",".join(
+                f"{json_dumps(export.entry_id)}:{export.json()}" for export in exports
+            )
+            return web.Response(text=f"{{{text}}}", content_type="application/json")
+        return web.Response(
+            text=renderPrometheus(exports), content_type=PROMETHEUS_CONTENT_TYPE
+        )
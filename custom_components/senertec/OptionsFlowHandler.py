@@ -1,22 +1,156 @@
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant import config_entries
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
+from homeassistant.helpers.selector import SelectOptionDict
+
+from .const import (
+    CONF_DEADBANDS,
+    CONF_DISABLED_DATAPOINTS,
+    CONF_EFFICIENCY_ELECTRICAL,
+    CONF_EFFICIENCY_FUEL,
+    CONF_EFFICIENCY_THERMAL,
+    DOMAIN,
+    OPTIONS_SCHEMA,
+)
 
-from .const import OPTIONS_SCHEMA
+CONF_ENABLED_DATAPOINTS = "enabled_datapoints"
 
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        self._options: dict[str, Any] = {}
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Manage the options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(data=user_input)
+            if not self._validDeadbands(user_input.get(CONF_DEADBANDS)):
+                errors[CONF_DEADBANDS] = "invalid_deadbands"
+        if user_input is not None and not errors:
+            self._options.update(user_input)
+            if self._datapoints():
+                return await self.async_step_datapoints()
+            return self.async_create_entry(
+                data={**self.config_entry.options, **self._options}
+            )
 
         return self.async_show_form(
             step_id="init",
             data_schema=self.add_suggested_values_to_schema(
-                OPTIONS_SCHEMA, self.config_entry.options
+                OPTIONS_SCHEMA, user_input or self.config_entry.options
             ),
+            errors=errors,
         )
+
+    @staticmethod
+    def _validDeadbands(deadbands) -> bool:
+        # datapoint id -> minimum change, e.g. {"MM011": 0.5}
+        if deadbands is None:
+            return True
+        return isinstance(deadbands, dict) and all(
+            isinstance(key, str)
+            and isinstance(value, (int, float))
+            and not isinstance(value, bool)
+            and value >= 0
+            for key, value in deadbands.items()
+        )
+
+    async def async_step_datapoints(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Select the datapoints which are requested from the units."""
+        datapoints = self._datapoints()
+        if user_input is not None:
+            enabled = set(user_input[CONF_ENABLED_DATAPOINTS])
+            disabled = [
+                option["value"]
+                for option in datapoints
+                if option["value"] not in enabled
+            ]
+            self._options[CONF_DISABLED_DATAPOINTS] = disabled
+            return await self.async_step_efficiency()
+
+        disabled = set(self.config_entry.options.get(CONF_DISABLED_DATAPOINTS, []))
+        return self.async_show_form(
+            step_id="datapoints",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_ENABLED_DATAPOINTS,
+                        default=[
+                            option["value"]
+                            for option in datapoints
+                            if option["value"] not in disabled
+                        ],
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=datapoints,
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                            multiple=True,
+                        ),
+                    )
+                }
+            ),
+        )
+
+    async def async_step_efficiency(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Select the datapoints of the efficiency sensor."""
+        datapoints = self._datapoints()
+        if user_input is not None:
+            self._options.update(user_input)
+            return self.async_create_entry(data=self._options)
+
+        values = {option["value"] for option in datapoints}
+        schema = {}
+        for option in (
+            CONF_EFFICIENCY_ELECTRICAL,
+            CONF_EFFICIENCY_THERMAL,
+            CONF_EFFICIENCY_FUEL,
+        ):
+            schema[
+                vol.Optional(
+                    option,
+                    default=[
+                        key
+                        for key in self.config_entry.options.get(option, [])
+                        if key in values
+                    ],
+                )
+            ] = selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=datapoints,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                    multiple=True,
+                ),
+            )
+        return self.async_show_form(
+            step_id="efficiency", data_schema=vol.Schema(schema)
+        )
+
+    def _datapoints(self) -> list[SelectOptionDict]:
+        # the datapoints the units delivered so far, deselected ones included
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if coordinator is None:
+            return []
+        devices = coordinator.data or {}
+        options = []
+        for (serial, datapoint), slot in coordinator.sensor_slots.items():
+            device = devices.get(serial)
+            if device is None:
+                continue
+            options.append(
+                SelectOptionDict(
+                    label=f"{device['device'].model} ({serial}): {slot.name or datapoint}",
+                    value=f"{serial}:{datapoint}",
+                )
+            )
+        return sorted(options, key=lambda option: option["label"])
@@ -0,0 +1,109 @@
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+
+# upper bounds in seconds of the histogram buckets, the last bucket takes everything above
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# seconds used for the websocket frame rate
+FRAME_RATE_WINDOW = 60
+
+
+class PhaseTiming:
+    """Histogram of the durations of one poll phase."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, duration: float):
+        """Add a duration in seconds."""
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        index = next(
+            (i for i, bound in enumerate(HISTOGRAM_BUCKETS) if duration <= bound),
+            len(HISTOGRAM_BUCKETS),
+        )
+        self.buckets[index] += 1
+
+    def as_dict(self) -> dict:
+        """Return the histogram as dict."""
+        return {
+            "count": self.count,
+            "average": round(self.total / self.count, 3) if self.count else None,
+            "max": round(self.max, 3),
+            "buckets": {
+                **{
+                    f"<={bound}s": count
+                    for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets)
+                },
+                f">{HISTOGRAM_BUCKETS[-1]}s": self.buckets[-1],
+            },
+        }
+
+
+class PollMetrics:
+    """Timings and counters of the poll pipeline of a config entry.
+
+    Written from executor and websocket threads, read from the event loop.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self._lock = threading.Lock()
+        self._phases: dict[str, PhaseTiming] = {}
+        self._failures: dict[str, int] = {}
+        self._frames = 0
+        self._frame_times: deque[float] = deque(maxlen=10000)
+
+    @contextmanager
+    def measure(self, phase: str):
+        """Measure the duration of a phase, an exception counts as failure."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.failure(phase)
+            raise
+        finally:
+            duration = time.monotonic() - start
+            with self._lock:
+                self._phases.setdefault(phase, PhaseTiming()).add(duration)
+
+    def failure(self, phase: str):
+        """Count a failure of a phase."""
+        with self._lock:
+            self._failures[phase] = self._failures.get(phase, 0) + 1
+
+    def frame(self):
+        """Count a received websocket value."""
+        now = time.monotonic()
+        with self._lock:
+            self._frames += 1
+            self._frame_times.append(now)
+
+    def frameRate(self) -> float:
+        """Return the received websocket values per second of the last minute."""
+        since = time.monotonic() - FRAME_RATE_WINDOW
+        with self._lock:
+            recent = sum(1 for frame in self._frame_times if frame >= since)
+        return round(recent / FRAME_RATE_WINDOW, 2)
+
+    def as_dict(self) -> dict:
+        """Return all metrics as dict."""
+        frame_rate = self.frameRate()
+        with self._lock:
+            return {
+                "phases": {
+                    phase: timing.as_dict() for phase, timing in self._phases.items()
+                },
+                "failures": dict(self._failures),
+                "frames": self._frames,
+                "frame_rate": frame_rate,
+            }
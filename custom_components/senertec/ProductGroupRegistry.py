@@ -0,0 +1,157 @@
+"""Validated product groups of productGroups.json and the user override."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    DATAPOINT_TIERS,
+    DOMAIN,
+    PRODUCTGROUPS_OVERRIDE_FILENAME,
+    PRODUCTGROUPS_REGISTRY,
+    PRODUCTGROUPSPATH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class InvalidProductGroups(HomeAssistantError):
+    """Error to indicate that a productGroups file is invalid."""
+
+
+class RequestEntry:
+    """A datapoint of a product group, optionally bound to a board and a refresh tier."""
+
+    __slots__ = ("board", "datapoint", "tier", "request")
+
+    def __init__(self, board: str | None, datapoint: str, tier: str | None):
+        """Initialize the entry."""
+        self.board = board
+        self.datapoint = datapoint
+        # None means the tier is taken from the obdClass of the datapoint
+        self.tier = tier
+        # the entry in the format of senertec.request
+        self.request = datapoint if board is None else [board, datapoint]
+
+
+def _normalizeEntry(productGroup: str, entry) -> RequestEntry:
+    # entries are either a datapoint name, [boardname, datapoint name]
+    # or {"datapoint": name, "board": boardname, "tier": tier}
+    if isinstance(entry, str) and entry:
+        return RequestEntry(None, entry, None)
+    if (
+        isinstance(entry, list)
+        and len(entry) == 2
+        and all(isinstance(part, str) and part for part in entry)
+    ):
+        return RequestEntry(entry[0], entry[1], None)
+    if (
+        isinstance(entry, dict)
+        and isinstance(entry.get("datapoint"), str)
+        and entry["datapoint"]
+        and set(entry) <= {"datapoint", "board", "tier"}
+    ):
+        board = entry.get("board")
+        tier = entry.get("tier")
+        if board is not None and not (isinstance(board, str) and board):
+            raise InvalidProductGroups(
+                f"Invalid board {board!r} in product group '{productGroup}'"
+            )
+        if tier is not None and tier not in DATAPOINT_TIERS:
+            raise InvalidProductGroups(
+                f"Invalid tier {tier!r} in product group '{productGroup}', "
+                f"expected one of {list(DATAPOINT_TIERS)}"
+            )
+        return RequestEntry(board, entry["datapoint"], tier)
+    raise InvalidProductGroups(
+        f"Invalid datapoint entry {entry!r} in product group '{productGroup}', "
+        'expected "DATAPOINT", ["BOARD", "DATAPOINT"] or '
+        '{"datapoint": "DATAPOINT", "board": "BOARD", "tier": "TIER"}'
+    )
+
+
+def _validate(groups, source: str) -> dict[str, tuple[RequestEntry, ...]]:
+    if not isinstance(groups, dict):
+        raise InvalidProductGroups(f"{source} must contain an object of product groups")
+    plans = {}
+    for productGroup, entries in groups.items():
+        if not isinstance(entries, list):
+            raise InvalidProductGroups(
+                f"Product group '{productGroup}' in {source} must be a list of datapoints"
+            )
+        plans[productGroup] = tuple(
+            _normalizeEntry(productGroup, entry) for entry in entries
+        )
+    return plans
+
+
+def _loadJson(path: str):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as ex:
+        raise InvalidProductGroups(f"Failed to load {path}: {ex}") from ex
+
+
+def _getMtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class ProductGroupRegistry:
+    """Request plans of all product groups, shared by all config entries."""
+
+    def __init__(
+        self,
+        plans: dict[str, tuple[RequestEntry, ...]],
+        override_mtime: float | None,
+    ):
+        """Initialize the registry from validated plans."""
+        self.override_mtime = override_mtime
+        self._plans = plans
+
+    def plan(self, productGroup: str) -> tuple[RequestEntry, ...]:
+        """Return the request entries of a product group.
+
+        Raises KeyError if the product group is unknown.
+        """
+        return self._plans[productGroup]
+
+    @classmethod
+    def load(cls, override_path: str, override_mtime: float | None):
+        """Load and validate productGroups.json and the override file."""
+        plans = _validate(_loadJson(PRODUCTGROUPSPATH), str(PRODUCTGROUPSPATH))
+        if override_mtime is not None:
+            override = _validate(_loadJson(override_path), override_path)
+            plans.update(override)
+            _LOGGER.info(
+                "Loaded productGroups override from %s, overriding groups: %s",
+                override_path,
+                list(override.keys()),
+            )
+        return cls(plans, override_mtime)
+
+
+async def async_get_registry(hass: HomeAssistant) -> ProductGroupRegistry:
+    """Return the shared registry, it is reloaded if the override file changed.
+
+    Raises InvalidProductGroups if a file is invalid.
+    """
+    override_path = hass.config.path(DOMAIN, PRODUCTGROUPS_OVERRIDE_FILENAME)
+    override_mtime = await hass.async_add_executor_job(_getMtime, override_path)
+    registry: ProductGroupRegistry | None = hass.data[DOMAIN].get(
+        PRODUCTGROUPS_REGISTRY
+    )
+    if registry is None or registry.override_mtime != override_mtime:
+        registry = await hass.async_add_executor_job(
+            ProductGroupRegistry.load, override_path, override_mtime
+        )
+        hass.data[DOMAIN][PRODUCTGROUPS_REGISTRY] = registry
+    return registry
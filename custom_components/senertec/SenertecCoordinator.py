@@ -1,38 +1,89 @@
+import asyncio
+from collections import deque
 from datetime import timedelta
 import logging
+import random
 import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_SCAN_INTERVAL
-from homeassistant.core import ServiceCall
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from senertec.client import canipValue, senertec
+from homeassistant.util import dt as dt_util, slugify
+from senertec.client import canipValue, energyUnit, senertec
 from senertec.lang import lang
-from senertec.senertecerror import InvalidCredentialsError
 
 from .const import (
+    BACKOFF_JITTER,
+    BACKOFF_MAX_INTERVAL,
+    CLOUD_MAX_CONNECTIONS,
+    CONF_DEADBANDS,
+    CONF_DISABLED_DATAPOINTS,
+    CONF_EFFICIENCY_ELECTRICAL,
+    CONF_EFFICIENCY_FUEL,
+    CONF_EFFICIENCY_THERMAL,
     CONF_LANG,
+    CONF_MAX_CONNECTIONS,
+    CONF_METRICS_EXPORT,
+    CONF_STREAMING,
     CONF_WAIT_INTERVAL,
     DEFAULT_LANG,
+    DEFAULT_MAX_CONNECTIONS,
     DEFAULT_POLL_INTERVAL,
+    DEFAULT_STREAMING,
     DEFAULT_WAIT_INTERVAL,
+    DATAPOINT_TIER_SLACK,
     DOMAIN,
+    ERRORS_REFRESH_INTERVAL,
+    FLOW_CLIENTS,
+    LATENCY_FACTOR,
+    LATENCY_WINDOW,
     SELECTED_DEVICES,
-    SENERTEC_POLL_SERVICE,
+    STREAM_BACKOFF_BASE,
+    STREAM_BACKOFF_MAX,
+    STREAM_DEBOUNCE,
+    UNITS_REFRESH_INTERVAL,
 )
+from .CloudPool import CloudPool
+from .CounterStatistics import CounterStatistics
+from .DatapointHistory import DatapointHistory, DerivedValue
+from .DatapointNames import DatapointNames
+from .MetricsExport import MetricsExport
+from .PollMetrics import PollMetrics
+from .ProductGroupRegistry import ProductGroupRegistry
+from .SenertecSession import SenertecSession
+from .SensorSlot import SensorSlot
+from .SnapshotStore import SnapshotStore
+from .SourceDatapoint import sourceDatapoint
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def sensor_unique_id(serial: str, datapoint: str) -> str:
+    """Return the unique id of the sensor of a datapoint."""
+    # device serial + the sensor datapoint id
+    return "sensor." + slugify(f"{serial}_{datapoint}")
+
+
 class SenertecCoordinator(DataUpdateCoordinator):
     """A Senertec energy systems wrapper class."""
 
-    def __init__(self, hass, config_entry: ConfigEntry, supportedItems):
+    def __init__(
+        self,
+        hass,
+        config_entry: ConfigEntry,
+        productGroups: ProductGroupRegistry,
+        pool: CloudPool,
+        names: DatapointNames,
+    ):
         """Initialize the Senertec energy system."""
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             # Name of the data. For logging purposes.
             name=DOMAIN,
             # Polling interval. Will only be polled if there are subscribers.
@@ -42,77 +93,548 @@ class SenertecCoordinator(DataUpdateCoordinator):
                 )
             ),
         )
-        language = self.config_entry.options.get(CONF_LANG, DEFAULT_LANG)
-        self.senertec_client = senertec(lang[language], _LOGGER.level)
+        # the configured interval, update_interval is stretched after failures and slow refreshes
+        self._base_interval = self.update_interval
+        self._failures = 0
+        self._durations: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._refreshing = False
+        self._fetch_failed = False
+        self._units_polled = 0
+        self._language = self.config_entry.options.get(CONF_LANG, DEFAULT_LANG)
+        # options which are applied, see async_apply_options
+        self._options = dict(config_entry.options)
+        # localized names of all languages, entities resolve their name from it
+        self.datapoint_names = names
+        # incremented when the names or the language changed
+        self.names_revision = 0
+        # incremented when the data changed or a refresh ended, the metrics export is rendered once per revision
+        self.data_revision = 0
+        self.export = MetricsExport(self)
+        # timings and counters of all sessions, see diagnostics.py
+        self.metrics = PollMetrics()
         # wait time for websocket data
         self.wait = config_entry.options.get(CONF_WAIT_INTERVAL, DEFAULT_WAIT_INTERVAL)
-        self.senertec_client.messagecallback = self._ws_callback
-        self.supportedItems = supportedItems
-
-    def _fetch(self):
-        try:
-            self.senertec_client.login(
-                self.config_entry.data.get(CONF_EMAIL),
-                self.config_entry.data.get(CONF_PASSWORD),
+        # minimum numeric change per datapoint id before a state is written
+        self._deadbands: dict[str, float] = config_entry.options.get(CONF_DEADBANDS) or {}
+        self.productGroups = productGroups
+        # shared by all config entries to limit and stagger cloud connections
+        self._pool = pool
+        # a senertec client can only be connected to one unit at a time,
+        # so every concurrently polled unit needs its own session
+        # more sessions than connections of the shared pool would only wait for it
+        max_connections = min(
+            config_entry.options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+            CLOUD_MAX_CONNECTIONS,
+        )
+        # the client and units of the config flow save the login of the first refresh
+        client, units = (
+            hass.data.get(DOMAIN, {})
+            .get(FLOW_CLIENTS, {})
+            .pop(config_entry.unique_id, (None, None))
+        )
+        if client is not None and client.language != lang[self._language]:
+            # sensor names are loaded by init in the language of the client
+            hass.async_create_background_task(
+                self._async_logout(client), "senertec logout"
             )
-        except InvalidCredentialsError:
-            raise ConfigEntryAuthFailed("Credentials seem to be expired or invalid")
-        init = self.senertec_client.init()
-        if not init:
-            _LOGGER.error("Init failed")
-            return
-        units = self.senertec_client.getUnits()
+            client = None
+        self._sessions = [
+            self._create_session(client if index == 0 else None)
+            for index in range(max_connections)
+        ]
+        self.senertec_client = self._sessions[0].client
+        self._idle_sessions: asyncio.Queue[SenertecSession] = asyncio.Queue()
+        for session in self._sessions:
+            self._idle_sessions.put_nowait(session)
+        # units of the account, only fetched every UNITS_REFRESH_INTERVAL
+        self._units: list[energyUnit] | None = units
+        self._units_fetched = time.monotonic()
+        # completion time and missing datapoints of the last poll per unit
+        self.poll_stats: dict[str, dict] = {}
+        # time.monotonic() of the last request per serial and datapoint, for the refresh tiers
+        self._last_requested: dict[str, dict[str, float]] = {}
+        # time.monotonic() of the last fetched error list per serial
+        self._errors_fetched: dict[str, float] = {}
+        # in streaming mode every unit keeps its own connected session
+        self.streaming = config_entry.options.get(CONF_STREAMING, DEFAULT_STREAMING)
+        self._stream_sessions: dict[str, SenertecSession] = {}
+        self._stream_failures: dict[str, int] = {}
+        self._stream_retry: dict[str, float] = {}
+        self._push_unsub = None
+        # snapshot which is filled during a refresh and swapped in when it completed
+        self._staging: dict | None = None
+        # latest state per (serial, datapoint), entities keep a reference to their slot
+        self.sensor_slots: dict[tuple[str, str], SensorSlot] = {}
+        # recent values of the numeric datapoints and the sensors derived from them
+        self.history = DatapointHistory()
+        self.derived_values: dict[tuple[str, str], DerivedValue] = {}
+        # source ids per serial which are not requested, see _excluded_datapoints
+        self._excluded: dict[str, frozenset[str]] = {}
+        # last known units and values, entities are created from it on startup
+        self.snapshot = SnapshotStore(hass, config_entry.entry_id)
+        self.statistics = CounterStatistics(hass)
+
+    def sensor_slot(self, serial: str, datapoint: str) -> SensorSlot:
+        """Return the slot of a datapoint, it is created if it does not exist yet."""
+        key = (serial, datapoint)
+        slot = self.sensor_slots.get(key)
+        if slot is None:
+            slot = self.sensor_slots[key] = SensorSlot()
+        return slot
+
+    async def async_restore_snapshot(self) -> bool:
+        """Set the data from the stored snapshot, returns False if there is none."""
+        data = await self.snapshot.async_load()
         selected_devices = self.config_entry.data.get(SELECTED_DEVICES)
-        if len(units) == 0:
-            _LOGGER.error("No devices were found")
-            return
-        for unit in units:
-            if unit.serial not in selected_devices:
-                continue
-            self.data[unit.serial] = {}
-            self.data[unit.serial]["sensors"] = {}
-            self.data[unit.serial]["device"] = unit
-            if not self.senertec_client.connectUnit(unit.serial):
-                _LOGGER.error("Connection to device: %s failed", unit.model)
+        data = {
+            serial: device
+            for serial, device in (data or {}).items()
+            if serial in selected_devices
+        }
+        if not data:
+            return False
+        for serial, device in data.items():
+            for datapoint, value in device["sensors"].items():
+                self._update_slot(serial, datapoint, value, device["updated"][datapoint])
+        # not async_set_updated_data, the first refresh is started by the caller
+        self.data = data
+        self.data_revision += 1
+        if self._units is None:
+            self._units = [device["device"] for device in data.values()]
+            self._units_fetched = time.monotonic()
+        _LOGGER.debug("Restored %s units from the snapshot", len(data))
+        return True
+
+    def datapoint_disabled(self, serial: str, datapoint: str) -> bool:
+        """Return True if the datapoint was deselected in the options."""
+        return f"{serial}:{datapoint}" in self.config_entry.options.get(
+            CONF_DISABLED_DATAPOINTS, []
+        )
+
+    def datapoint_name(self, datapoint: str, default: str | None) -> str | None:
+        """Return the name of a datapoint in the configured language."""
+        return self.datapoint_names.get(self._language, datapoint, default)
+
+    def _collect_names(self):
+        for session in [*self._sessions, *self._stream_sessions.values()]:
+            if session.names is None:
                 continue
-            _LOGGER.info("Connection to device: %s successful", unit.model)
-            errors = self.senertec_client.getErrors()
-            self.data[unit.serial]["errors"] = errors
-            self._request_sensors()
-            self.senertec_client.disconnectUnit()
-
-    def _request_sensors(self):
-        _LOGGER.debug("Requesting Senertec heating unit sensors...")
+            # the names of the language of the login, the session may have switched since
+            language, names = session.names
+            session.names = None
+            if (
+                names
+                and self.datapoint_names.update(language, names)
+                and language == self._language
+            ):
+                self.names_revision += 1
+
+    def async_apply_options(self) -> bool:
+        """Apply changed options without rebuilding the sessions.
+
+        Returns False if an option changed which needs a reload of the config entry.
+        """
+        options = self.config_entry.options
+        changed = {
+            key
+            for key in options.keys() | self._options.keys()
+            if options.get(key) != self._options.get(key)
+        }
+        if CONF_DISABLED_DATAPOINTS in changed:
+            self._remove_entities(
+                set(options.get(CONF_DISABLED_DATAPOINTS, []))
+                - set(self._options.get(CONF_DISABLED_DATAPOINTS, []))
+            )
+        self._options = dict(options)
+        if changed - {
+            CONF_LANG,
+            CONF_SCAN_INTERVAL,
+            CONF_WAIT_INTERVAL,
+            CONF_DISABLED_DATAPOINTS,
+            CONF_METRICS_EXPORT,
+            CONF_DEADBANDS,
+            CONF_EFFICIENCY_ELECTRICAL,
+            CONF_EFFICIENCY_THERMAL,
+            CONF_EFFICIENCY_FUEL,
+        }:
+            return False
+        if CONF_SCAN_INTERVAL in changed:
+            self._base_interval = timedelta(
+                minutes=options.get(CONF_SCAN_INTERVAL, DEFAULT_POLL_INTERVAL)
+            )
+            if not self._failures:
+                self.update_interval = self._base_interval
+        if CONF_WAIT_INTERVAL in changed:
+            self.wait = options.get(CONF_WAIT_INTERVAL, DEFAULT_WAIT_INTERVAL)
+        if CONF_DEADBANDS in changed:
+            self._deadbands = options.get(CONF_DEADBANDS) or {}
+        if CONF_LANG in changed:
+            self._language = options.get(CONF_LANG, DEFAULT_LANG)
+            for session in [*self._sessions, *self._stream_sessions.values()]:
+                session.setLanguage(self._language)
+            # entities take the cached names right away, values and errors follow the next login
+            self.names_revision += 1
+        if changed & {CONF_EFFICIENCY_ELECTRICAL, CONF_EFFICIENCY_THERMAL, CONF_EFFICIENCY_FUEL}:
+            self._derive(self.data or {})
+        if changed & {
+            CONF_LANG,
+            CONF_DISABLED_DATAPOINTS,
+            CONF_EFFICIENCY_ELECTRICAL,
+            CONF_EFFICIENCY_THERMAL,
+            CONF_EFFICIENCY_FUEL,
+        }:
+            # the sensor platform adds the entities of selected datapoints again
+            self.async_update_listeners()
+        _LOGGER.debug("Applied changed options %s", changed)
+        return True
+
+    def _remove_entities(self, disabled: set[str]):
+        # entities of deselected datapoints would not be updated anymore
+        registry = er.async_get(self.hass)
+        for key in disabled:
+            serial, _, datapoint = key.partition(":")
+            entity_id = registry.async_get_entity_id(
+                "sensor", DOMAIN, sensor_unique_id(serial, datapoint)
+            )
+            if entity_id is not None:
+                registry.async_remove(entity_id)
+
+    def _excluded_datapoints(self) -> dict[str, frozenset[str]]:
+        """Return the source ids per serial which are deselected or whose entity is disabled.
+
+        Deselecting one value of an array excludes the whole array, it is requested at once.
+        """
+        excluded: dict[str, set[str]] = {}
+        for key in self.config_entry.options.get(CONF_DISABLED_DATAPOINTS, []):
+            serial, _, datapoint = key.partition(":")
+            excluded.setdefault(serial, set()).add(sourceDatapoint(datapoint))
+        registry = er.async_get(self.hass)
+        disabled = {
+            entry.unique_id
+            for entry in er.async_entries_for_config_entry(
+                registry, self.config_entry.entry_id
+            )
+            if entry.disabled_by is not None
+        }
+        if disabled:
+            for serial, datapoint in self.sensor_slots:
+                if sensor_unique_id(serial, datapoint) in disabled:
+                    excluded.setdefault(serial, set()).add(sourceDatapoint(datapoint))
+        return {serial: frozenset(datapoints) for serial, datapoints in excluded.items()}
+
+    def _update_slot(self, serial: str, datapoint: str, value: canipValue, updated):
+        deadband = self._deadbands.get(sourceDatapoint(datapoint), 0)
+        self.sensor_slot(serial, datapoint).update(value, updated, deadband)
+        self.history.add(serial, datapoint, updated, value.dataValue)
+
+    def _ratios(self) -> dict[str, dict[str, tuple[tuple[str, ...], tuple[str, ...]]]]:
+        """Return the ratios per serial which are configured in the options."""
+        options = self.config_entry.options
+        selected: dict[str, dict[str, list[str]]] = {}
+        for option in (CONF_EFFICIENCY_ELECTRICAL, CONF_EFFICIENCY_THERMAL, CONF_EFFICIENCY_FUEL):
+            for key in options.get(option, []):
+                serial, _, datapoint = key.partition(":")
+                selected.setdefault(serial, {}).setdefault(option, []).append(datapoint)
+        ratios = {}
+        for serial, datapoints in selected.items():
+            outputs = (
+                *datapoints.get(CONF_EFFICIENCY_ELECTRICAL, []),
+                *datapoints.get(CONF_EFFICIENCY_THERMAL, []),
+            )
+            fuel = tuple(datapoints.get(CONF_EFFICIENCY_FUEL, []))
+            if outputs and fuel:
+                ratios[serial] = {"Efficiency": (outputs, fuel)}
+        return ratios
+
+    def _derive(self, data: dict):
+        self.derived_values = self.history.derive(
+            {serial: device["device"] for serial, device in data.items()},
+            self.sensor_slots,
+            dt_util.utcnow(),
+            self._ratios(),
+        )
+
+    async def _async_logout(self, client: senertec):
+        await self.hass.async_add_executor_job(client.logout)
+
+    def _create_session(self, client: senertec | None = None) -> SenertecSession:
+        return SenertecSession(
+            self.hass,
+            self.config_entry.data.get(CONF_EMAIL),
+            self.config_entry.data.get(CONF_PASSWORD),
+            self._language,
+            self._ws_callback,
+            self.metrics,
+            client,
+        )
+
+    async def _async_cloud_job(self, target, *args):
+        async with self._pool.connection:
+            return await self.hass.async_add_executor_job(target, *args)
+
+    async def _async_poll_unit(self, unit: energyUnit):
+        if (
+            self.streaming
+            and time.monotonic() >= self._stream_retry.get(unit.serial, 0)
+            and await self._async_stream_unit(unit)
+        ):
+            return
+        session = await self._idle_sessions.get()
         try:
-            self.senertec_client.request(self.supportedItems)
-            # wait for websocket to receive data
-            time.sleep(self.wait)
-        except KeyError as ex:
-            _LOGGER.error("Please check your productGroups.json. An entry for your heating unit model is missing. %s", ex)
+            async with self._pool.connection:
+                result = await session.async_pollUnit(
+                    unit,
+                    self.productGroups,
+                    self.wait,
+                    self._last_requested.setdefault(unit.serial, {}),
+                    self._errors_due(unit.serial),
+                    excluded=self._excluded.get(unit.serial, frozenset()),
+                )
+        finally:
+            self._idle_sessions.put_nowait(session)
+        self._store_result(unit, result)
+
+    async def _async_stream_unit(self, unit: energyUnit) -> bool:
+        """Poll the unit over its own session and keep it connected afterwards."""
+        session = self._stream_sessions.get(unit.serial)
+        if session is None:
+            session = self._stream_sessions[unit.serial] = self._create_session()
+        async with self._pool.connection:
+            result = await session.async_pollUnit(
+                unit,
+                self.productGroups,
+                self.wait,
+                self._last_requested.setdefault(unit.serial, {}),
+                self._errors_due(unit.serial),
+                True,
+                excluded=self._excluded.get(unit.serial, frozenset()),
+            )
+        if result is None:
+            failures = self._stream_failures.get(unit.serial, 0) + 1
+            self._stream_failures[unit.serial] = failures
+            delay = min(STREAM_BACKOFF_BASE * 2 ** (failures - 1), STREAM_BACKOFF_MAX)
+            self._stream_retry[unit.serial] = time.monotonic() + delay
+            _LOGGER.warning(
+                "Streaming connection to %s failed, falling back to polling for %ss",
+                unit.model,
+                delay,
+            )
+            return False
+        self._stream_failures.pop(unit.serial, None)
+        self._store_result(unit, result)
+        return True
 
-    async def async_setup(self) -> None:
-        """Set up senertec."""
+    def _errors_due(self, serial: str) -> bool:
+        fetched = self._errors_fetched.get(serial)
+        return (
+            fetched is None
+            or time.monotonic() - fetched
+            >= ERRORS_REFRESH_INTERVAL * 60 - DATAPOINT_TIER_SLACK
+        )
 
-        async def request_update(call: ServiceCall) -> None:
-            """Request update."""
-            await self.async_request_refresh()
+    def _store_result(self, unit: energyUnit, result):
+        if result is None:
+            return
+        self._units_polled += 1
+        errors, stats = result
+        if errors is not None:
+            self._errors_fetched[unit.serial] = time.monotonic()
+            self._staging[unit.serial]["errors"] = errors
+            # entities only rebuild their error state if the hash changed
+            self._staging[unit.serial]["errors_hash"] = hash(
+                tuple(
+                    (
+                        error.code,
+                        error.boardName,
+                        error.errorCategory,
+                        error.errorTranslation,
+                        error.timestamp,
+                    )
+                    for error in errors
+                )
+            )
+        if stats is not None:
+            self.poll_stats[unit.serial] = stats
 
-        self.hass.services.async_register(DOMAIN, SENERTEC_POLL_SERVICE, request_update)
+    async def async_request_full_refresh(self) -> None:
+        """Request a refresh of all datapoints regardless of their tier and the errors."""
+        self._last_requested.clear()
+        self._errors_fetched.clear()
+        self._units = None
+        await self.async_request_refresh()
 
     async def _async_update_data(self):
         """Update senertec data."""
+        if self._refreshing:
+            # e.g. a manual poll while a scheduled one is still running
+            _LOGGER.debug("Refresh is still running, skipping")
+            return self.data
+        self._refreshing = True
+        self._fetch_failed = True
+        start = time.monotonic()
+        try:
+            await self._pool.async_wait_for_start()
+            start = time.monotonic()
+            with self.metrics.measure("refresh"):
+                return await self._async_fetch()
+        finally:
+            self._staging = None
+            self._refreshing = False
+            self._adapt_interval(time.monotonic() - start, self._fetch_failed)
+            # the failure counter of the metrics export changes on failed refreshes as well
+            self.data_revision += 1
+
+    @property
+    def consecutive_failures(self) -> int:
+        """Return the number of failed refreshes in a row."""
+        return self._failures
+
+    def _adapt_interval(self, duration: float, failed: bool):
+        """Stretch the poll interval after failures and slow refreshes."""
+        self._durations.append(duration)
+        self._failures = self._failures + 1 if failed else 0
+        interval = self._base_interval.total_seconds()
+        if self._failures:
+            # exponential backoff with jitter, so accounts do not retry at the same time,
+            # the jitter is applied before the limit so the interval never exceeds it
+            interval *= 2 ** min(self._failures, 32) * (1 + random.uniform(0, BACKOFF_JITTER))
+            interval = min(interval, BACKOFF_MAX_INTERVAL * 60)
+        average = sum(self._durations) / len(self._durations)
+        interval = max(interval, average * LATENCY_FACTOR)
+        if interval != self.update_interval.total_seconds():
+            _LOGGER.debug(
+                "Next poll in %.0fs after %s failed refreshes, average refresh took %.1fs",
+                interval,
+                self._failures,
+                average,
+            )
+        self.update_interval = timedelta(seconds=interval)
+
+    async def _async_get_units(self) -> list[energyUnit] | None:
+        if (
+            self._units is not None
+            and time.monotonic() - self._units_fetched < UNITS_REFRESH_INTERVAL * 60
+        ):
+            return self._units
+        session = await self._idle_sessions.get()
+        try:
+            units = await self._async_cloud_job(session.getUnits)
+        finally:
+            self._idle_sessions.put_nowait(session)
+        if units:
+            self._units = units
+            self._units_fetched = time.monotonic()
+        return units
+
+    async def _async_fetch(self):
         _LOGGER.debug("Starting sensor data update")
-        self.data = {}
-        await self.hass.async_add_executor_job(self._fetch)
-        await self._stop()
+        previous = self.data or {}
+        units = await self._async_get_units()
+        if not units:
+            _LOGGER.error("No devices were found")
+            self._fetch_failed = True
+            return previous
+        selected_devices = self.config_entry.data.get(SELECTED_DEVICES)
+        units = [unit for unit in units if unit.serial in selected_devices]
+        staging = {}
+        for unit in units:
+            # values which are not received again are kept with their old timestamp
+            old = previous.get(unit.serial, {})
+            staging[unit.serial] = {
+                "device": unit,
+                "sensors": dict(old.get("sensors", {})),
+                "updated": dict(old.get("updated", {})),
+                "errors": old.get("errors", []),
+                "errors_hash": old.get("errors_hash"),
+            }
+        self._staging = staging
+        self._excluded = self._excluded_datapoints()
+        # units are polled concurrently, limited by the number of sessions
+        self._units_polled = 0
+        # a failing unit must not cancel the others, they write into the staging snapshot
+        results = await asyncio.gather(
+            *(self._async_poll_unit(unit) for unit in units), return_exceptions=True
+        )
+        auth_failed = None
+        for unit, result in zip(units, results):
+            if isinstance(result, ConfigEntryAuthFailed):
+                auth_failed = result
+            elif isinstance(result, Exception):
+                _LOGGER.error("Polling device %s failed: %s", unit.model, result)
+            elif isinstance(result, BaseException):
+                raise result
+        if auth_failed is not None:
+            raise auth_failed
+        self._fetch_failed = bool(units) and self._units_polled == 0
+        for serial, device in staging.items():
+            updated = device["updated"]
+            for datapoint, value in device["sensors"].items():
+                if self.sensor_slot(serial, datapoint).updated != updated.get(datapoint):
+                    self._update_slot(serial, datapoint, value, updated.get(datapoint))
+        self._collect_names()
+        self._derive(staging)
+        self.data_revision += 1
+        if not self._fetch_failed:
+            self.snapshot.async_delay_save(lambda: self.data)
+            self.statistics.async_add(
+                {serial: device["device"] for serial, device in staging.items()},
+                self.sensor_slots,
+            )
         _LOGGER.debug("Finished sensor data update")
-        return self.data
+        return staging
 
-    async def _stop(self):
+    async def async_shutdown(self) -> None:
+        """Log out from senertec when the config entry is unloaded."""
+        await super().async_shutdown()
         _LOGGER.debug("Stopping Senertec energy system connection")
-        await self.hass.async_add_executor_job(self.senertec_client.logout)
+        if self._push_unsub is not None:
+            self._push_unsub()
+            self._push_unsub = None
+        for session in [*self._sessions, *self._stream_sessions.values()]:
+            await self.hass.async_add_executor_job(session.logout)
+        # the current hour is imported as well, it is overwritten after a restart
+        await self.statistics.async_import()
+
+    @callback
+    def _schedule_push(self):
+        # collect streamed values for a moment instead of updating on every frame
+        if self._push_unsub is None:
+            self._push_unsub = async_call_later(
+                self.hass, STREAM_DEBOUNCE, self._async_push
+            )
+
+    @callback
+    def _async_push(self, _now):
+        self._push_unsub = None
+        self._derive(self.data)
+        self.data_revision += 1
+        # does not reschedule the next refresh like async_set_updated_data would
+        self.async_update_listeners()
+        self.snapshot.async_delay_save(lambda: self.data)
+        self.statistics.async_add(
+            {serial: device["device"] for serial, device in self.data.items()},
+            self.sensor_slots,
+        )
 
     def _ws_callback(self, value: canipValue):
+        # called from the websocket thread, the data is only changed on the event loop
+        self.hass.loop.call_soon_threadsafe(self._async_store_value, value)
+
+    @callback
+    def _async_store_value(self, value: canipValue):
         _LOGGER.debug("Received Sensor: %s, Value %s, Unit: %s", value.sourceDatapoint, value.dataValue, value.dataUnit)
+        # during a refresh values go to the staging snapshot, pushed values to the current data
+        refreshing = self._staging is not None
+        data = self._staging if refreshing else self.data
+        device = (data or {}).get(value.deviceSerial)
+        if device is None:
+            _LOGGER.debug("Dropping value of unknown device %s", value.deviceSerial)
+            return
         # append the received value to the correct device
-        self.data[value.deviceSerial]["sensors"][value.sourceDatapoint] = value
+        now = dt_util.utcnow()
+        device["sensors"][value.sourceDatapoint] = value
+        device["updated"][value.sourceDatapoint] = now
+        if self.streaming and not refreshing:
+            self._update_slot(value.deviceSerial, value.sourceDatapoint, value, now)
+            # value was pushed by a unit which is kept connected
+            self._schedule_push()
@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from senertec.client import canipValue, energyUnit, senertec
+from senertec.lang import lang
+from senertec.senertecerror import InvalidCredentialsError, LoginServerError
+
+from .const import ARRAY_QUIET_GAP, DATAPOINT_TIER_SLACK, DATAPOINT_TIERS
+from .PollMetrics import PollMetrics
+from .ProductGroupRegistry import ProductGroupRegistry, RequestEntry
+from .SourceDatapoint import sourceDatapoint
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SenertecSession:
+    """An authenticated senertec client which can poll one unit at a time."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        email: str,
+        password: str,
+        language: str,
+        value_callback: Callable[[canipValue], None],
+        metrics: PollMetrics,
+        client: senertec | None = None,
+    ):
+        """Initialize the session, login happens on first use unless a logged in client is passed."""
+        self._hass = hass
+        self.language = language
+        self._email = email
+        self._password = password
+        self._value_callback = value_callback
+        self._metrics = metrics
+        self.client = client or senertec(lang[language], _LOGGER.level)
+        self.client.messagecallback = self._ws_callback
+        # the session is kept across polls and only renewed when it expired
+        self._logged_in = client is not None
+        # login again on the next poll, e.g. to load the translations of another language
+        self._renew = False
+        # language and localized names per source datapoint of the last init, taken by the coordinator
+        self.names: tuple[str, dict[str, str]] | None = (
+            (language, self._metadataNames()) if client is not None else None
+        )
+        # serial of the unit which is currently connected
+        self.connected_serial = None
+        # datapoints of the currently polled unit which were not received yet
+        self._pending: set[str] = set()
+        # arrays among the requested datapoints, their values arrive one frame per index
+        self._arrays: set[str] = set()
+        self._pending_serial = None
+        self._received_all = asyncio.Event()
+        self._quiet_handle: asyncio.TimerHandle | None = None
+        # resolved request plan per serial, source ids are stable across logins
+        self._resolved: dict[str, tuple[tuple[RequestEntry, ...], list]] = {}
+
+    def _login(self) -> bool:
+        _LOGGER.debug("Logging in to Senertec")
+        # init loads the names in this language, setLanguage may change it meanwhile
+        language = self.language
+        self._logged_in = False
+        self.connected_serial = None
+        try:
+            with self._metrics.measure("login"):
+                self.client.login(self._email, self._password)
+        except InvalidCredentialsError:
+            raise ConfigEntryAuthFailed("Credentials seem to be expired or invalid")
+        except LoginServerError as ex:
+            raise UpdateFailed(f"Login to Senertec failed: {ex}") from ex
+        with self._metrics.measure("init"):
+            init = self.client.init()
+        if not init:
+            _LOGGER.error("Init failed")
+            self._metrics.failure("init")
+            return False
+        self._logged_in = True
+        self.names = (language, self._metadataNames())
+        return True
+
+    def _metadataNames(self) -> dict[str, str]:
+        # init loads the metadata of all datapoints, not only of the connected unit
+        translations = getattr(self.client, "__metaDataTranslations__", None) or {}
+        points = getattr(self.client, "__metaDataPoints__", None) or {}
+        return {
+            point["friendlyName"]: translations[point["name"]]
+            for point in points.values()
+            if point.get("friendlyName") is not None
+            and point.get("name") in translations
+        }
+
+    def setLanguage(self, language: str):
+        """Switch the language, the translations are loaded by the next login."""
+        if language == self.language:
+            return
+        self.language = language
+        self.client.language = lang[language]
+        self._renew = True
+
+    def _session_alive(self) -> bool:
+        # the websocket closes when the server drops the session
+        return self._logged_in and getattr(
+            self.client, "__is_ws_connected__", True
+        )
+
+    def ensure(self) -> bool:
+        """Login if there is no valid session."""
+        if self._renew:
+            self._renew = False
+            self.logout()
+        if self._session_alive():
+            return True
+        if self._logged_in:
+            _LOGGER.info("Senertec session expired, logging in again")
+            self.logout()
+        return self._login()
+
+    def logout(self):
+        """Logout if logged in."""
+        if not self._logged_in:
+            return
+        self._logged_in = False
+        self.connected_serial = None
+        try:
+            with self._metrics.measure("logout"):
+                self.client.logout()
+        except Exception as ex:  # noqa: BLE001
+            # the session is dropped either way
+            _LOGGER.debug("Logout from Senertec failed: %s", ex)
+
+    def getUnits(self) -> list[energyUnit] | None:
+        """Return all units of the account."""
+        if not self.ensure():
+            return None
+        units = self._getUnits()
+        if units is None:
+            # an expired session is answered with an error status, renew it once
+            _LOGGER.debug("Fetching units failed, renewing session")
+            self.logout()
+            if not self._login():
+                return None
+            units = self._getUnits()
+        return units
+
+    def _getUnits(self) -> list[energyUnit] | None:
+        with self._metrics.measure("getUnits"):
+            units = self.client.getUnits()
+        if units is None:
+            self._metrics.failure("getUnits")
+        return units
+
+    async def async_pollUnit(
+        self,
+        unit: energyUnit,
+        productGroups: ProductGroupRegistry,
+        wait: int,
+        lastRequested: dict[str, float],
+        fetchErrors: bool = True,
+        keep_connected: bool = False,
+        excluded: frozenset[str] = frozenset(),
+    ):
+        """Connect to the unit, request its sensors and return the errors and poll stats.
+
+        Only datapoints whose tier is due are requested, lastRequested holds the
+        time.monotonic() of the last request per datapoint and is updated.
+        Datapoints whose source id is in excluded are not requested.
+        The errors are None if fetchErrors is False.
+        With keep_connected the unit stays connected and the next poll skips connectUnit
+        unless it fetches the errors.
+        Returns None if the unit could not be connected.
+
+        The blocking client calls run in the executor, the wait for the websocket
+        data happens on the event loop and does not occupy an executor thread.
+        Raises if a client call failed, the unit is disconnected in that case.
+        """
+        try:
+            connected, errors = await self._hass.async_add_executor_job(
+                self._connect, unit, fetchErrors
+            )
+            if not connected:
+                return None
+            stats = await self._async_request_sensors(
+                unit, productGroups, wait, lastRequested, excluded
+            )
+        except BaseException:
+            # a failed poll never leaves the unit connected
+            keep_connected = False
+            raise
+        finally:
+            if not keep_connected and self.connected_serial is not None:
+                await self._hass.async_add_executor_job(self._disconnect)
+        return errors, stats
+
+    def _connect(self, unit: energyUnit, fetchErrors: bool):
+        if not self.ensure():
+            return False, None
+        if self.connected_serial == unit.serial and fetchErrors:
+            # getErrors only returns the errors loaded by connectUnit, a unit
+            # which is kept connected has to be connected again to refresh them
+            self._disconnect()
+        if self.connected_serial != unit.serial:
+            connected = self._connectUnit(unit)
+            if not connected:
+                # an expired session is answered with an error status, renew it once
+                _LOGGER.debug(
+                    "Connection to device: %s failed, renewing session", unit.model
+                )
+                self.logout()
+                connected = self._login() and self._connectUnit(unit)
+            if not connected:
+                _LOGGER.error("Connection to device: %s failed", unit.model)
+                # force a new login on the next poll
+                self.logout()
+                return False, None
+            _LOGGER.info("Connection to device: %s successful", unit.model)
+            self.connected_serial = unit.serial
+        errors = None
+        if fetchErrors:
+            with self._metrics.measure("getErrors"):
+                errors = self.client.getErrors()
+        return True, errors
+
+    def _connectUnit(self, unit: energyUnit) -> bool:
+        with self._metrics.measure("connectUnit"):
+            connected = self.client.connectUnit(unit.serial)
+        if not connected:
+            self._metrics.failure("connectUnit")
+        return connected
+
+    def _disconnect(self):
+        try:
+            with self._metrics.measure("disconnectUnit"):
+                self.client.disconnectUnit()
+        except Exception as ex:  # noqa: BLE001
+            # the next login drops the connection to the unit as well
+            _LOGGER.debug("Disconnect from unit failed: %s", ex)
+            self.logout()
+        self.connected_serial = None
+
+    def _resolve(self, plan: tuple[RequestEntry, ...]):
+        """Resolve the request plan entries to the datapoints the unit provides.
+
+        Returns (entry, source datapoint, refresh interval in seconds, array) per provided entry.
+        """
+        resolved = []
+        for entry in plan:
+            name = entry.datapoint.lower()
+            for board in self.client.boards:
+                if entry.board is not None and board.boardName != entry.board:
+                    continue
+                # same lookup as senertec.board.getFullDatapointIdByName
+                datapoint = next(
+                    (dp for dp in board.datapoints if name in dp.sourceId.lower()),
+                    None,
+                )
+                if datapoint is not None:
+                    tier = entry.tier or datapoint.type.value.lower()
+                    interval = DATAPOINT_TIERS.get(tier, 0) * 60
+                    resolved.append(
+                        (entry, datapoint.sourceId, interval, bool(datapoint.array))
+                    )
+                    break
+        return resolved
+
+    def _request(
+        self,
+        unit: energyUnit,
+        productGroups: ProductGroupRegistry,
+        lastRequested: dict[str, float],
+        excluded: frozenset[str],
+        start: float,
+    ) -> set[str]:
+        """Request the due datapoints and return them."""
+        plan = productGroups.plan(unit.productGroup)
+        cached = self._resolved.get(unit.serial)
+        if cached is not None and cached[0] is plan:
+            resolved = cached[1]
+        else:
+            resolved = self._resolve(plan)
+            if resolved:
+                # an empty result e.g. when the boards were not loaded is resolved again
+                self._resolved[unit.serial] = (plan, resolved)
+        due = [
+            (entry, datapoint, array)
+            for entry, datapoint, interval, array in resolved
+            if datapoint not in excluded
+            and (
+                datapoint not in lastRequested
+                or start - lastRequested[datapoint] >= interval - DATAPOINT_TIER_SLACK
+            )
+        ]
+        expected = {datapoint for _, datapoint, _ in due}
+        self._pending = set(expected)
+        self._arrays = {datapoint for _, datapoint, array in due if array}
+        self._pending_serial = unit.serial
+        if expected:
+            with self._metrics.measure("request"):
+                self.client.request(
+                    {unit.productGroup: [entry.request for entry, _, _ in due]}
+                )
+            for datapoint in expected:
+                lastRequested[datapoint] = start
+        return expected
+
+    async def _async_request_sensors(
+        self,
+        unit: energyUnit,
+        productGroups: ProductGroupRegistry,
+        wait: int,
+        lastRequested: dict[str, float],
+        excluded: frozenset[str],
+    ):
+        _LOGGER.debug("Requesting Senertec heating unit sensors...")
+        start = time.monotonic()
+        # set from the websocket thread once all datapoints were received
+        self._received_all = asyncio.Event()
+        try:
+            expected = await self._hass.async_add_executor_job(
+                self._request, unit, productGroups, lastRequested, excluded, start
+            )
+            if not self._pending:
+                self._received_all.set()
+            # wait until the websocket received all datapoints, at most wait seconds
+            with self._metrics.measure("websocketWait"):
+                try:
+                    async with asyncio.timeout(wait):
+                        await self._received_all.wait()
+                    complete = True
+                except TimeoutError:
+                    # arrays which still wait for their quiet gap delivered values
+                    complete = not self._pending
+            if not complete:
+                self._metrics.failure("websocketWait")
+        except KeyError as ex:
+            _LOGGER.error("Please check your productGroups.json. An entry for your heating unit model is missing. %s", ex)
+            return None
+        finally:
+            self._pending_serial = None
+            if self._quiet_handle is not None:
+                self._quiet_handle.cancel()
+                self._quiet_handle = None
+        duration = time.monotonic() - start
+        missing = sorted(self._pending)
+        # datapoints which were not received are requested again on the next poll
+        for datapoint in missing:
+            lastRequested.pop(datapoint, None)
+        if complete:
+            _LOGGER.debug(
+                "Received all %s datapoints of %s in %.2fs",
+                len(expected),
+                unit.model,
+                duration,
+            )
+        else:
+            _LOGGER.debug(
+                "Timeout after %ss, datapoints of %s not received: %s",
+                wait,
+                unit.model,
+                missing,
+            )
+        return {
+            "duration": round(duration, 3),
+            "complete": complete,
+            "expected": len(expected),
+            "received": len(expected) - len(missing),
+            "missing": missing,
+        }
+
+    def _ws_callback(self, value: canipValue):
+        self._metrics.frame()
+        self._value_callback(value)
+        if value.deviceSerial == self._pending_serial:
+            self._pending.discard(sourceDatapoint(value.sourceDatapoint))
+            if not self._pending:
+                received_all = self._received_all
+                if self._arrays:
+                    # the first index of an array does not mean its other indices arrived,
+                    # they are complete once no value arrived for ARRAY_QUIET_GAP seconds
+                    self._hass.loop.call_soon_threadsafe(
+                        self._async_quiet_gap, received_all
+                    )
+                else:
+                    self._hass.loop.call_soon_threadsafe(received_all.set)
+
+    def _async_quiet_gap(self, received_all: asyncio.Event):
+        # restarted by every value, runs on the event loop
+        if received_all is not self._received_all or self._pending_serial is None:
+            return
+        if self._quiet_handle is not None:
+            self._quiet_handle.cancel()
+        self._quiet_handle = self._hass.loop.call_later(
+            ARRAY_QUIET_GAP, received_all.set
+        )
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import cast
+
+from homeassistant.helpers.typing import StateType
+from senertec.client import canipValue
+
+
+class SensorSlot:
+    """Latest state of one datapoint of a unit."""
+
+    __slots__ = ("value", "unit", "name", "updated", "revision")
+
+    def __init__(self):
+        """Initialize an empty slot."""
+        self.value: StateType = None
+        self.unit: str | None = None
+        self.name: str | None = None
+        self.updated: datetime | None = None
+        # incremented on every change, entities only write their state if it differs
+        self.revision = 0
+
+    def update(self, value: canipValue, updated: datetime, deadband: float = 0) -> bool:
+        """Take over a value received from the websocket.
+
+        Numeric changes smaller than deadband are ignored. Returns True if the slot changed.
+        """
+        new_value = cast(StateType, value.dataValue)
+        # keep the last known unit if a value is received without one
+        unit = value.dataUnit if value.dataUnit != "" else self.unit
+        self.updated = updated
+        if (
+            unit == self.unit
+            and value.friendlyDataName == self.name
+            and self._unchanged(new_value, deadband)
+        ):
+            return False
+        self.value = new_value
+        self.unit = unit
+        self.name = value.friendlyDataName
+        self.revision += 1
+        return True
+
+    def _unchanged(self, new_value: StateType, deadband: float) -> bool:
+        if (
+            deadband
+            and isinstance(new_value, (int, float))
+            and isinstance(self.value, (int, float))
+            and not isinstance(new_value, bool)
+        ):
+            return abs(new_value - self.value) < deadband
+        return new_value == self.value
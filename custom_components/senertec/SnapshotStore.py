@@ -0,0 +1,116 @@
+"""Last known units and sensor values of a config entry, persisted across restarts."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from senertec.client import canipValue, energyUnit
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+
+
+def _dumpUnit(unit: energyUnit) -> dict:
+    return {
+        "serial": unit.serial,
+        "model": unit.model,
+        "productGroup": unit.productGroup,
+        "itemNumber": unit.itemNumber,
+    }
+
+
+def _loadUnit(data: dict) -> energyUnit:
+    unit = energyUnit()
+    unit.serial = data["serial"]
+    unit.model = data["model"]
+    unit.productGroup = data["productGroup"]
+    unit.itemNumber = data.get("itemNumber", "")
+    return unit
+
+
+def _dumpValue(value: canipValue, updated: datetime | None) -> dict:
+    return {
+        "value": value.dataValue,
+        "unit": value.dataUnit,
+        "name": value.friendlyDataName,
+        "board": value.boardName,
+        "array": value.array,
+        "updated": updated.isoformat() if updated else None,
+    }
+
+
+def _loadValue(serial: str, datapoint: str, data: dict) -> canipValue:
+    value = canipValue()
+    value.deviceSerial = serial
+    value.sourceDatapoint = datapoint
+    value.dataValue = data["value"]
+    value.dataUnit = data["unit"]
+    value.friendlyDataName = data["name"]
+    value.boardName = data.get("board", "")
+    value.array = data.get("array", False)
+    return value
+
+
+class SnapshotStore:
+    """Stores the units and sensor values of the coordinator data in HA storage.
+
+    Errors are not stored, they are fetched again by the first refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize the store of a config entry."""
+        self._store: Store[dict] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry_id}"
+        )
+
+    async def async_load(self) -> dict | None:
+        """Return the stored data in the format of the coordinator data or None."""
+        snapshot = await self._store.async_load()
+        if not snapshot:
+            return None
+        data = {}
+        for serial, stored in snapshot["units"].items():
+            sensors = {}
+            updated = {}
+            for datapoint, value in stored["sensors"].items():
+                sensors[datapoint] = _loadValue(serial, datapoint, value)
+                updated[datapoint] = (
+                    dt_util.parse_datetime(value["updated"])
+                    if value.get("updated")
+                    else None
+                )
+            data[serial] = {
+                "device": _loadUnit(stored["device"]),
+                "sensors": sensors,
+                "updated": updated,
+                "errors": [],
+                "errors_hash": None,
+            }
+        return data
+
+    def async_delay_save(self, data_func):
+        """Save the data returned by data_func after a delay, writes in between are merged."""
+        self._store.async_delay_save(
+            lambda: self._dump(data_func()), SNAPSHOT_SAVE_DELAY
+        )
+
+    async def async_remove(self):
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
+
+    @staticmethod
+    def _dump(data: dict | None) -> dict:
+        return {
+            "units": {
+                serial: {
+                    "device": _dumpUnit(device["device"]),
+                    "sensors": {
+                        datapoint: _dumpValue(value, device["updated"].get(datapoint))
+                        for datapoint, value in device["sensors"].items()
+                    },
+                }
+                for serial, device in (data or {}).items()
+            }
+        }
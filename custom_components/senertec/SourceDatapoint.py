@@ -0,0 +1,10 @@
+"""Source id of the datapoint of a sensor."""
+
+
+def sourceDatapoint(datapoint: str) -> str:
+    """Return the source id of a datapoint, the datapoints are requested by it.
+
+    Values of arrays have their index appended to the datapoint name, e.g. XX000_0.
+    """
+    base, _, index = datapoint.rpartition("_")
+    return base if base and index.isdigit() else datapoint
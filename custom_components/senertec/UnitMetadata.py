@@ -0,0 +1,46 @@
+"""Device and state class of a sensor by its unit of measurement."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+
+
+class UnitMetadata(NamedTuple):
+    """Device and state class of the sensors of one unit."""
+
+    device_class: SensorDeviceClass | None
+    state_class: SensorStateClass | None
+
+
+NO_METADATA = UnitMetadata(None, None)
+
+UNIT_METADATA: dict[str, UnitMetadata] = {
+    "W": UnitMetadata(SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "kW": UnitMetadata(SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "Wh": UnitMetadata(SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING),
+    "kWh": UnitMetadata(SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING),
+    "°C": UnitMetadata(SensorDeviceClass.TEMPERATURE, None),
+    "%": UnitMetadata(SensorDeviceClass.POWER_FACTOR, None),
+    "l": UnitMetadata(SensorDeviceClass.VOLUME_STORAGE, None),
+    "m": UnitMetadata(SensorDeviceClass.DISTANCE, None),
+    "bar": UnitMetadata(SensorDeviceClass.PRESSURE, SensorStateClass.MEASUREMENT),
+    "m³": UnitMetadata(SensorDeviceClass.GAS, SensorStateClass.TOTAL_INCREASING),
+    # there is no device class for rotational speed
+    "Rpm": UnitMetadata(None, SensorStateClass.MEASUREMENT),
+    "Hours": UnitMetadata(None, SensorStateClass.TOTAL_INCREASING),
+}
+
+# product group -> unit -> metadata, takes precedence over UNIT_METADATA
+PRODUCT_GROUP_UNIT_METADATA: dict[str, dict[str, UnitMetadata]] = {}
+
+
+@lru_cache(maxsize=256)
+def unitMetadata(productGroup: str, unit: str | None) -> UnitMetadata:
+    """Return the metadata of a unit of a product group."""
+    overrides = PRODUCT_GROUP_UNIT_METADATA.get(productGroup, {})
+    if unit in overrides:
+        return overrides[unit]
+    return UNIT_METADATA.get(unit, NO_METADATA)
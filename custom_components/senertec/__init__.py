@@ -2,21 +2,26 @@
 
 from __future__ import annotations
 
-import json
 import logging
-import os
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ConfigEntryError
 
+from .CloudPool import CloudPool
+from .DatapointNames import async_get_names
+from .MetricsExport import MetricsExport, SenertecMetricsView
 from .const import (
+    CLOUD_MAX_CONNECTIONS,
+    CLOUD_POLL_STAGGER,
+    CLOUD_POOL,
     DOMAIN,
     PLATFORMS,
-    PRODUCTGROUPS_OVERRIDE_FILENAME,
-    PRODUCTGROUPSPATH,
-    SENERTEC_COORDINATOR,
+    SENERTEC_POLL_SERVICE,
 )
+from .ProductGroupRegistry import InvalidProductGroups, async_get_registry
 from .SenertecCoordinator import SenertecCoordinator
+from .SnapshotStore import SnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,54 +31,73 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
-    return True
-
+    hass.data[DOMAIN][CLOUD_POOL] = CloudPool(CLOUD_MAX_CONNECTIONS, CLOUD_POLL_STAGGER)
 
-def _loadProductGroupsOverride(path: str) -> dict | None:
-    if not os.path.isfile(path):
-        return None
-    try:
-        with open(path, encoding="utf-8") as file:
-            return json.load(file)
-    except (OSError, json.JSONDecodeError) as ex:
-        _LOGGER.warning("Failed to load productGroups override at %s: %s", path, ex)
-        return None
+    async def request_update(call: ServiceCall) -> None:
+        """Request update of all accounts."""
+        for coordinator in list(hass.data[DOMAIN].values()):
+            if isinstance(coordinator, SenertecCoordinator):
+                await coordinator.async_request_full_refresh()
 
+    hass.services.async_register(DOMAIN, SENERTEC_POLL_SERVICE, request_update)
 
-async def _getProductGroups(hass: HomeAssistant):
-    file = await hass.async_add_executor_job(
-        open,
-        PRODUCTGROUPSPATH,
-    )
-    supportedItems = json.load(file)
-    file.close()
+    def enabled_exports() -> list[MetricsExport]:
+        return [
+            coordinator.export
+            for coordinator in hass.data[DOMAIN].values()
+            if isinstance(coordinator, SenertecCoordinator)
+            and coordinator.export.enabled
+        ]
 
-    override_path = hass.config.path(DOMAIN, PRODUCTGROUPS_OVERRIDE_FILENAME)
-    override = await hass.async_add_executor_job(
-        _loadProductGroupsOverride, override_path
-    )
-    if override:
-        supportedItems.update(override)
-        _LOGGER.info(
-            "Loaded productGroups override from %s, overriding groups: %s",
-            override_path,
-            list(override.keys()),
-        )
-    return supportedItems
+    hass.http.register_view(SenertecMetricsView(enabled_exports))
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Senertec energy systems integration from a config entry."""
     _LOGGER.debug("Setting up senertec component")
 
-    supportedItems = await _getProductGroups(hass)
+    try:
+        productGroups = await async_get_registry(hass)
+    except InvalidProductGroups as ex:
+        raise ConfigEntryError(str(ex)) from ex
     senertec_coordinator = SenertecCoordinator(
         hass,
         entry,
-        supportedItems,
+        productGroups,
+        hass.data[DOMAIN][CLOUD_POOL],
+        await async_get_names(hass),
     )
-    await senertec_coordinator.async_setup()
-    await senertec_coordinator.async_refresh()
-    hass.data[DOMAIN][SENERTEC_COORDINATOR] = senertec_coordinator
+    # with a snapshot the entities are created right away and refreshed in the background
+    restored = await senertec_coordinator.async_restore_snapshot()
+    if not restored:
+        await senertec_coordinator.async_refresh()
+    hass.data[DOMAIN][entry.entry_id] = senertec_coordinator
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+    if restored:
+        entry.async_create_background_task(
+            hass, senertec_coordinator.async_refresh(), "senertec first refresh"
+        )
     return True
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options, the entry is only reloaded if they require it."""
+    senertec_coordinator: SenertecCoordinator = hass.data[DOMAIN][entry.entry_id]
+    if not senertec_coordinator.async_apply_options():
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        senertec_coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await senertec_coordinator.async_shutdown()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the snapshot of a deleted config entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
@@ -13,37 +13,56 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity_registry as er, selector
 from homeassistant.helpers.selector import SelectOptionDict
-from senertec.client import senertec
+from senertec.client import energyUnit, senertec
 from senertec.senertecerror import LoginServerError, InvalidCredentialsError
 
-from .const import DEVICES, DOMAIN, SELECTED_DEVICES, STEP_USER_DATA_SCHEMA
+from .const import (
+    DEVICES,
+    DOMAIN,
+    FLOW_CLIENTS,
+    SELECTED_DEVICES,
+    STEP_USER_DATA_SCHEMA,
+)
 from .OptionsFlowHandler import OptionsFlowHandler
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _connect(client: senertec, email: str, password: str) -> list[energyUnit]:
+    client.login(email, password)
+    try:
+        if not client.init():
+            raise InitFailed
+        devices = client.getUnits()
+        if not devices or len(devices) == 0:
+            raise NoUnits
+    except Exception:
+        # the client is not handed over, so its session and websocket are closed here
+        try:
+            client.logout()
+        except Exception as ex:  # noqa: BLE001
+            _LOGGER.debug("Logout from Senertec failed: %s", ex)
+        raise
+    return devices
+
+
+async def _async_logout(hass: HomeAssistant, client: senertec):
+    await hass.async_add_executor_job(client.logout)
+
+
 async def validate_connection(hass: HomeAssistant, data: dict[str, Any]):
     """Validate the user input allows us to connect.
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+    Returns the logged in client and the units of the account.
     """
     _LOGGER.debug("Trying to connect to Senertec Dachsportal2 during Setup")
     client = senertec(level=_LOGGER.level)
-    await hass.async_add_executor_job(
-        client.login, data[CONF_EMAIL], data[CONF_PASSWORD]
+    # one executor job for the whole login instead of one per call
+    devices = await hass.async_add_executor_job(
+        _connect, client, data[CONF_EMAIL], data[CONF_PASSWORD]
     )
-    if not await hass.async_add_executor_job(client.init):
-        raise InitFailed
-    devices = await hass.async_add_executor_job(client.getUnits)
-    if not devices or len(devices) == 0:
-        raise NoUnits
-    await hass.async_add_executor_job(client.logout)
-    return {
-        DEVICES: [
-            SelectOptionDict(label=f"{dev.model} (S/N: {dev.serial}, Type: {dev.productGroup})", value=dev.serial)
-            for dev in devices
-        ]
-    }
+    return client, devices
 
 
 class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -54,6 +73,9 @@ class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         """Initialize the Senertec config flow."""
         self.senertec_config: dict[str, Any] = {}
+        # logged in client and units, handed over to the coordinator of the entry
+        self._client: senertec | None = None
+        self._units: list[energyUnit] | None = None
 
     async def async_step_reauth(
         self, entry_data: Mapping[str, Any]
@@ -77,10 +99,16 @@ class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> config_entries.ConfigFlowResult:
         errors = {}
         if user_input:
+            # a client of a previous attempt is not needed anymore
+            self._logout()
             try:
-                self.senertec_config.update(
-                    await validate_connection(self.hass, user_input)
+                self._client, self._units = await validate_connection(
+                    self.hass, user_input
                 )
+                self.senertec_config[DEVICES] = [
+                    SelectOptionDict(label=f"{dev.model} (S/N: {dev.serial}, Type: {dev.productGroup})", value=dev.serial)
+                    for dev in self._units
+                ]
             except LoginServerError:
                 errors["base"] = "cannot_connect"
             except InvalidCredentialsError:
@@ -99,6 +127,7 @@ class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     self._abort_if_unique_id_configured()
                     return await self.async_step_devices()
                 self._abort_if_unique_id_mismatch()
+                self._handOver()
                 return self.async_update_reload_and_abort(
                     self._get_reauth_entry(),
                     data_updates=user_input,
@@ -113,6 +142,7 @@ class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> config_entries.ConfigFlowResult:
         if user_input:
             self.senertec_config.update(user_input)
+            self._handOver()
             return self.async_create_entry(
                 title=f"Senertec - {self.senertec_config[CONF_EMAIL]}",
                 data=self.senertec_config,
@@ -134,6 +164,26 @@ class SenertecConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
         )
 
+    def _handOver(self):
+        # the entry is set up right after the flow, its first refresh needs no new login
+        self.hass.data.setdefault(DOMAIN, {}).setdefault(FLOW_CLIENTS, {})[
+            self.unique_id
+        ] = (self._client, self._units)
+        self._client = None
+
+    @callback
+    def _logout(self) -> None:
+        if self._client is not None:
+            self.hass.async_create_background_task(
+                _async_logout(self.hass, self._client), "senertec config flow logout"
+            )
+            self._client = None
+
+    @callback
+    def async_remove(self) -> None:
+        """Logout if the flow ended without handing over the client."""
+        self._logout()
+
     @staticmethod
     @callback
     def async_get_options_flow(
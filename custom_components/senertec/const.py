@@ -7,24 +7,88 @@ import voluptuous as vol
 from voluptuous import All, Range
 
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_SCAN_INTERVAL, Platform
+from homeassistant.helpers import selector
 
 DOMAIN = "senertec"
 DEFAULT_POLL_INTERVAL: Final = 10
 DEFAULT_WAIT_INTERVAL: Final = 5
-SENERTEC_COORDINATOR = "senertec_coordinator"
+DEFAULT_MAX_CONNECTIONS: Final = 2
+DEFAULT_STREAMING: Final = False
+# seconds to collect streamed values before entities are updated
+STREAM_DEBOUNCE: Final = 2
+# seconds to wait before streaming is retried after a failed connection, doubled on each failure
+STREAM_BACKOFF_BASE: Final = 60
+STREAM_BACKOFF_MAX: Final = 3600
+PRODUCTGROUPS_REGISTRY = "productgroups_registry"
+CLOUD_POOL = "cloud_pool"
+DATAPOINT_NAMES = "datapoint_names"
+NAMES_STORAGE_VERSION: Final = 1
+# seconds to collect changes before the names are written to storage
+NAMES_SAVE_DELAY: Final = 60
+# logged in clients and units of finished config flows, taken over by the coordinator
+FLOW_CLIENTS = "flow_clients"
+# refresh interval of the unit list in minutes
+UNITS_REFRESH_INTERVAL: Final = 360
+# concurrent cloud connections of all config entries together
+CLOUD_MAX_CONNECTIONS: Final = 4
+# seconds between the start of two refreshes of different config entries
+CLOUD_POLL_STAGGER: Final = 5
 # SENERTEC_SENSORS = "senertec_sensors"
+SNAPSHOT_STORAGE_VERSION: Final = 1
+# counters with these units are imported as external long-term statistics
+STATISTICS_UNITS: Final = ("Wh", "kWh", "Hours")
+# seconds to collect changes before the snapshot is written to storage
+SNAPSHOT_SAVE_DELAY: Final = 60
 DEFAULT_LANG = "English"
 SELECTED_DEVICES = "selected_devices"
 DEVICES = "devices"
 LANGUAGES = ["German", "English"]
 CONF_LANG: Final = "sensor_lang"
 CONF_WAIT_INTERVAL: Final = "wait_interval"
+CONF_MAX_CONNECTIONS: Final = "max_connections"
+CONF_STREAMING: Final = "streaming"
+# "serial:datapoint" keys of datapoints which are not requested
+CONF_DISABLED_DATAPOINTS: Final = "disabled_datapoints"
+CONF_METRICS_EXPORT: Final = "metrics_export"
+# numeric changes of a datapoint smaller than its deadband are not written to the state machine
+# keyed by the datapoint id without array index, e.g. {"MM011": 0.5}
+CONF_DEADBANDS: Final = "deadbands"
+DEFAULT_METRICS_EXPORT: Final = False
 PLATFORMS: Final = [Platform.SENSOR]
 SENERTEC_POLL_SERVICE: Final = "senertec"
 # DEFAULT_NAME = "Senertec"
 SENERTEC_URL = "https://dachsconnect.senertec.com"
 PRODUCTGROUPSPATH = Path(Path(__file__).parent.resolve(), "productGroups.json")
 PRODUCTGROUPS_OVERRIDE_FILENAME = "productGroups.override.json"
+# refresh interval in minutes per datapoint tier, 0 means on every poll
+# the tier of a datapoint defaults to its obdClass unless set in productGroups.json
+DATAPOINT_TIERS: Final[dict[str, int]] = {
+    "signal": 0,
+    "counter": 15,
+    "parameter": 60,
+}
+# seconds a datapoint may be requested early, so it is not postponed by one poll due to jitter
+DATAPOINT_TIER_SLACK: Final = 30
+# seconds without a new value of an array after which its values are considered complete
+ARRAY_QUIET_GAP: Final = 1
+# refresh interval of the error list of a unit in minutes
+ERRORS_REFRESH_INTERVAL: Final = 30
+# upper limit in minutes for the poll interval after failed refreshes
+BACKOFF_MAX_INTERVAL: Final = 60
+# random share added to the poll interval after failed refreshes
+BACKOFF_JITTER: Final = 0.2
+# number of refreshes used for the rolling refresh duration
+LATENCY_WINDOW: Final = 10
+# the poll interval is at least this multiple of the rolling refresh duration
+LATENCY_FACTOR: Final = 2
+# number of values kept per numeric datapoint for the derived sensors
+HISTORY_SIZE: Final = 60
+# minutes over which the derived sensors are computed
+HISTORY_WINDOW: Final = 60
+# "serial:datapoint" keys of the efficiency sensor, (electrical + thermal output) / fuel input
+CONF_EFFICIENCY_ELECTRICAL: Final = "efficiency_electrical"
+CONF_EFFICIENCY_THERMAL: Final = "efficiency_thermal"
+CONF_EFFICIENCY_FUEL: Final = "efficiency_fuel"
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -47,5 +111,21 @@ OPTIONS_SCHEMA = vol.Schema(
             CONF_WAIT_INTERVAL,
             default=DEFAULT_WAIT_INTERVAL,
         ): All(int, Range(min=2, max=60)),
+        vol.Required(
+            CONF_MAX_CONNECTIONS,
+            default=DEFAULT_MAX_CONNECTIONS,
+        ): All(int, Range(min=1, max=CLOUD_MAX_CONNECTIONS)),
+        vol.Required(
+            CONF_STREAMING,
+            default=DEFAULT_STREAMING,
+        ): bool,
+        vol.Required(
+            CONF_METRICS_EXPORT,
+            default=DEFAULT_METRICS_EXPORT,
+        ): bool,
+        vol.Optional(
+            CONF_DEADBANDS,
+            default={},
+        ): selector.ObjectSelector(),
     }
 )
@@ -0,0 +1,39 @@
+"""Diagnostics support for the Senertec energy systems integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .SenertecCoordinator import SenertecCoordinator
+
+TO_REDACT = {CONF_EMAIL, CONF_PASSWORD, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics of a config entry."""
+    coordinator: SenertecCoordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "consecutive_failures": coordinator.consecutive_failures,
+        "last_update_success": coordinator.last_update_success,
+        "units": {
+            serial: {
+                "model": device["device"].model,
+                "productGroup": device["device"].productGroup,
+                "datapoints": len(device["sensors"]),
+                "errors": [error.code for error in device["errors"]],
+                "poll": coordinator.poll_stats.get(serial),
+            }
+            for serial, device in (coordinator.data or {}).items()
+        },
+        "metrics": coordinator.metrics.as_dict(),
+    }
@@ -1,7 +1,7 @@
 """Support for senertec sensors."""
 
+from functools import lru_cache
 import logging
-from typing import Any, cast
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -9,7 +9,8 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -17,25 +18,93 @@ from homeassistant.util import slugify
 from senertec.client import canipError, canipValue, energyUnit
 
 from . import SenertecCoordinator
-from .const import DOMAIN, SENERTEC_COORDINATOR, SENERTEC_URL
+from .SenertecCoordinator import sensor_unique_id
+from .const import DOMAIN, SENERTEC_URL
+from .DatapointHistory import DerivedValue
+from .UnitMetadata import unitMetadata
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=64)
+def _deviceInfo(serial: str, model: str, productGroup: str) -> DeviceInfo:
+    # shared by all entities of a unit
+    return DeviceInfo(
+        identifiers={
+            # Serial numbers are unique identifiers within a specific domain
+            (DOMAIN, serial)
+        },
+        name=f"{model} - {serial}",
+        manufacturer="Senertec",
+        model=model,
+        model_id=productGroup,
+        serial_number=serial,
+        configuration_url=SENERTEC_URL,
+    )
+
+
+# marks the error state of a SenertecErrorSensor as not built yet
+_UNSET = object()
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities
 ):
-    coordinator = hass.data[DOMAIN][SENERTEC_COORDINATOR]
-    if coordinator.data:
-        for value in coordinator.data.values():
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    # serials and (serial, datapoint) keys which already have an entity
+    known: set = set()
+
+    @callback
+    def _add_new_entities() -> None:
+        entities = []
+        for serial, value in (coordinator.data or {}).items():
             device = value.get("device")
-            sensors = value.get("sensors", {})
-            for sensor_value in sensors.values():
-                async_add_entities([SenertecSensor(coordinator, sensor_value, device)])
-            errors = value.get("errors", [])
-            async_add_entities([SenertecErrorSensor(coordinator, errors, device)])
-    else:
+            for datapoint, sensor_value in value.get("sensors", {}).items():
+                if coordinator.datapoint_disabled(serial, datapoint):
+                    # the options flow removed its entity, it is added again when selected
+                    known.discard((serial, datapoint))
+                    continue
+                if (serial, datapoint) in known:
+                    continue
+                known.add((serial, datapoint))
+                entities.append(SenertecSensor(coordinator, sensor_value, device))
+            if serial not in known:
+                known.add(serial)
+                errors = value.get("errors", [])
+                entities.append(SenertecErrorSensor(coordinator, errors, device))
+                entities.append(
+                    SenertecPollSensor(
+                        coordinator,
+                        device,
+                        "duration",
+                        "Poll duration",
+                        UnitOfTime.SECONDS,
+                        SensorDeviceClass.DURATION,
+                    )
+                )
+                entities.append(
+                    SenertecPollSensor(
+                        coordinator, device, "received", "Received datapoints"
+                    )
+                )
+        for (serial, key), derived in coordinator.derived_values.items():
+            if (serial, key) in known:
+                continue
+            known.add((serial, key))
+            entities.append(
+                SenertecDerivedSensor(
+                    coordinator, coordinator.data[serial]["device"], key, derived
+                )
+            )
+        if entities:
+            _LOGGER.debug("Adding %s new senertec entities", len(entities))
+            async_add_entities(entities)
+
+    if not coordinator.data:
         _LOGGER.warning("No sensor data found")
+    _add_new_entities()
+    # datapoints which arrive after the first refresh get their entity later
+    config_entry.async_on_unload(coordinator.async_add_listener(_add_new_entities))
 
 
 class SenertecSensor(CoordinatorEntity, SensorEntity):
@@ -48,82 +117,55 @@ class SenertecSensor(CoordinatorEntity, SensorEntity):
         super().__init__(coordinator)
         self.device = device
         self._datapoint = value.sourceDatapoint
-        # create a unique id from device serial + boardname which is the sensor connected to + the sensor datapoint id
-        uid = "sensor." + slugify(f"{self.device.serial}_{value.sourceDatapoint}")
+        uid = sensor_unique_id(device.serial, value.sourceDatapoint)
         self.entity_id = uid
         self._attr_unique_id = uid
-        self._value: StateType = None
-        self._unit = None
-        self._name = None
-
-    def _getSensor(self):
-        return (
-            self.coordinator.data.get(self.device.serial, {})
-            .get("sensors", {})
-            .get(self._datapoint)
+        # the slot is updated by the coordinator, no lookup is needed on state writes
+        self._slot = coordinator.sensor_slot(device.serial, value.sourceDatapoint)
+        self._revision = self._slot.revision
+        self._names_revision = coordinator.names_revision
+        self._available = True
+        self._attr_device_info = _deviceInfo(
+            device.serial, device.model, device.productGroup
         )
+        self._resolveName()
+        self._resolveUnit()
 
-    @property
-    def name(self):
-        entity = self._getSensor()
-        if entity is not None:
-            self._name = entity.friendlyDataName
-        return self._name
-
-    @property
-    def native_value(self) -> StateType:
-        value = self._getSensor()
-        if value is not None:
-            self._value = cast(StateType, value.dataValue)
-        return self._value
-
-    @property
-    def native_unit_of_measurement(self):
-        value = self._getSensor()
-        if value is not None and value.dataUnit != "":
-            self._unit = value.dataUnit
-        return self._unit
+    def _resolveName(self):
+        # the cached name stays available when the datapoint is missing from a poll
+        self._attr_name = self.coordinator.datapoint_name(
+            self._datapoint, self._slot.name
+        )
 
-    @property
-    def device_class(self):
-        unit = self.native_unit_of_measurement
-        if unit == "W":
-            return SensorDeviceClass.POWER
-        if unit in ("Wh", "kWh"):
-            return SensorDeviceClass.ENERGY
-        if unit == "°C":
-            return SensorDeviceClass.TEMPERATURE
-        if unit == "%":
-            return SensorDeviceClass.POWER_FACTOR
-        if unit == "l":
-            return SensorDeviceClass.VOLUME_STORAGE
-        if unit == "m":
-            return SensorDeviceClass.DISTANCE
-        return None
+    def _resolveUnit(self):
+        # classes are only looked up when the unit changes, not on every state write
+        self._attr_native_unit_of_measurement = self._slot.unit
+        metadata = unitMetadata(self.device.productGroup, self._slot.unit)
+        self._attr_device_class = metadata.device_class
+        self._attr_state_class = metadata.state_class
 
-    @property
-    def state_class(self):
-        unit = self.native_unit_of_measurement
-        if unit in ("W", "Rpm"):
-            return SensorStateClass.MEASUREMENT
-        if unit in ("Wh", "kWh", "Hours"):
-            return SensorStateClass.TOTAL_INCREASING
-        return None
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # only write the state if the value or the availability changed
+        available = self.available
+        names_revision = self.coordinator.names_revision
+        if (
+            self._revision == self._slot.revision
+            and self._available == available
+            and self._names_revision == names_revision
+        ):
+            return
+        self._revision = self._slot.revision
+        self._available = available
+        self._names_revision = names_revision
+        self._resolveName()
+        if self._slot.unit != self._attr_native_unit_of_measurement:
+            self._resolveUnit()
+        super()._handle_coordinator_update()
 
     @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.device.serial)
-            },
-            name=f"{self.device.model} - {self.device.serial}",
-            manufacturer="Senertec",
-            model=self.device.model,
-            model_id=self.device.productGroup,
-            serial_number=self.device.serial,
-            configuration_url=SENERTEC_URL,
-        )
+    def native_value(self) -> StateType:
+        return self._slot.value
 
 
 class SenertecErrorSensor(CoordinatorEntity, SensorEntity):
@@ -138,65 +180,150 @@ class SenertecErrorSensor(CoordinatorEntity, SensorEntity):
         uid = "sensor." + slugify(f"{device.serial} errors")
         self.entity_id = uid
         self._attr_unique_id = uid
-        self._value: StateType = None
+        self._errors_hash = _UNSET
+        self._attr_device_info = _deviceInfo(
+            device.serial, device.model, device.productGroup
+        )
+        self._refreshErrors()
+        self._available = True
+
+    def _refreshErrors(self) -> bool:
+        """Rebuild state and attributes if the errors changed, returns True if they did."""
+        device = self.coordinator.data.get(self.device.serial, {})
+        errors_hash = device.get("errors_hash")
+        if errors_hash == self._errors_hash:
+            return False
+        self._errors_hash = errors_hash
+        errors: list[canipError] = device.get("errors", [])
+        # merge all error codes to one value/string
+        self._attr_native_value = ",".join(error.code for error in errors)
+        self._attr_extra_state_attributes = {
+            "translation": "".join(
+                f"{error.code}: {error.errorTranslation}\n" for error in errors
+            ),
+            "category": "".join(
+                f"{error.code}: {error.errorCategory}\n" for error in errors
+            ),
+            "timestamp": "".join(
+                f"{error.code}: {error.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                for error in errors
+            ),
+            "board": "".join(f"{error.code}: {error.boardName}\n" for error in errors),
+        }
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # only write the state if the errors or the availability changed
+        changed = self._refreshErrors()
+        available = self.available
+        if not changed and self._available == available:
+            return
+        self._available = available
+        super()._handle_coordinator_update()
 
     @property
     def name(self):
         return "Current Errors"
 
-    @property
-    def native_value(self) -> StateType:
-        merged = ""
-        # merge all error codes to one value/string
-        for error in self.coordinator.data.get(self.device.serial, {}).get(
-            "errors", {}
-        ):
-            merged += f"{error.code},"
-        self._value = merged.removesuffix(",")
-        return self._value
-
     @property
     def icon(self):
         return "mdi:alert"
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        translation = ""
-        category = ""
-        timestamp = ""
-        board = ""
-        for error in self.coordinator.data.get(self.device.serial, {}).get(
-            "errors", {}
-        ):
-            translation += f"{error.code}: {error.errorTranslation}\n"
-            category += f"{error.code}: {error.errorCategory}\n"
-            timestamp += (
-                f"{error.code}: {error.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            )
-            board += f"{error.code}: {error.boardName}\n"
-        return {
-            "translation": translation,
-            "category": category,
-            "timestamp": timestamp,
-            "board": board,
-        }
-
     @property
     def entity_category(self):
         return EntityCategory.DIAGNOSTIC
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.device.serial)
-            },
-            name=f"{self.device.model} - {self.device.serial}",
-            manufacturer="Senertec",
-            model=self.device.model,
-            model_id=self.device.productGroup,
-            serial_number=self.device.serial,
-            configuration_url=SENERTEC_URL,
+
+class SenertecPollSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a diagnostic sensor about the last poll of a unit."""
+
+    coordinator: SenertecCoordinator
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator,
+        device: energyUnit,
+        key: str,
+        name: str,
+        unit: str | None = None,
+        device_class: SensorDeviceClass | None = None,
+    ):
+        """Initialize the poll sensor, key is the entry of the coordinator's poll_stats."""
+        super().__init__(coordinator)
+        self.device = device
+        uid = "sensor." + slugify(f"{device.serial} poll {key}")
+        self.entity_id = uid
+        self._attr_unique_id = uid
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_device_info = _deviceInfo(
+            device.serial, device.model, device.productGroup
         )
+        self._key = key
+        self._attr_native_value = self._statValue()
+        self._available = True
+
+    def _statValue(self) -> StateType:
+        stats = self.coordinator.poll_stats.get(self.device.serial)
+        return None if stats is None else stats[self._key]
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # only write the state if the value or the availability changed
+        value = self._statValue()
+        available = self.available
+        if self._attr_native_value == value and self._available == available:
+            return
+        self._attr_native_value = value
+        self._available = available
+        super()._handle_coordinator_update()
+
+
+class SenertecDerivedSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a sensor computed from the recent values of datapoints."""
+
+    coordinator: SenertecCoordinator
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self, coordinator, device: energyUnit, key: str, derived: DerivedValue
+    ):
+        """Initialize the derived sensor, key is the entry of the coordinator's derived_values."""
+        super().__init__(coordinator)
+        self.device = device
+        uid = sensor_unique_id(device.serial, key)
+        self.entity_id = uid
+        self._attr_unique_id = uid
+        self._attr_device_info = _deviceInfo(
+            device.serial, device.model, device.productGroup
+        )
+        self._key = key
+        # ratios are configured in the options, so they are wanted right away
+        self._attr_entity_registry_enabled_default = key.startswith("ratio_")
+        self._attr_native_unit_of_measurement = derived.unit
+        self._attr_device_class = derived.device_class
+        self._attr_state_class = derived.state_class
+        self._attr_name = derived.name
+        self._attr_native_value = derived.value
+        self._available = True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # only write the state if the value or the availability changed
+        derived = self.coordinator.derived_values.get((self.device.serial, self._key))
+        value = None if derived is None else derived.value
+        available = self.available
+        if self._attr_native_value == value and self._available == available:
+            return
+        self._attr_native_value = value
+        if derived is not None:
+            self._attr_name = derived.name
+        self._available = available
+        super()._handle_coordinator_update()